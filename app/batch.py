@@ -0,0 +1,162 @@
+import os
+import signal
+import time
+from io import StringIO
+from multiprocessing import Pool, Queue
+from queue import Empty
+from lox.lox import Lox, preload
+from lox.output import CaptureOutput
+
+DEFAULT_TIMEOUT = 30.0
+# How long past its timeout a script may run before its worker is killed.
+# A script only runs on past its alarm when it is stuck in a native, which
+# the alarm cannot interrupt.
+GRACE = 1.0
+
+# Where a worker says which script it has started, and when.
+_started = None
+
+
+class ScriptTimeout(BaseException):
+    # Not an Exception, so that nothing in the interpreter can catch it.
+    pass
+
+
+def find_scripts(target: str) -> list[str]:
+    # A directory is searched for .lox files. Any other file is a manifest
+    # listing one script per line, relative to the manifest, where blank
+    # lines and lines starting with "#" are skipped.
+    if os.path.isdir(target):
+        scripts = []
+        for directory, _, files in os.walk(target):
+            scripts.extend(os.path.join(directory, name)
+                           for name in files if name.endswith(".lox"))
+        return sorted(scripts)
+
+    base = os.path.dirname(target)
+    with open(target) as manifest:
+        lines = [line.strip() for line in manifest]
+    return [os.path.join(base, line) for line in lines
+            if line and not line.startswith("#")]
+
+
+def interrupt(signum, frame):
+    raise ScriptTimeout()
+
+
+def start_worker(started):
+    global _started
+    _started = started
+    preload()
+
+
+def run_script(job: tuple[int, str, str, dict, float]) -> dict:
+    index, filename, engine, settings, timeout = job
+    if _started is not None:
+        _started.put((index, os.getpid(), time.time()))
+    output = CaptureOutput()
+    errors = StringIO()
+    lox = Lox(output=output, errors=errors, **settings)
+    timed_out = False
+    status = 0
+
+    signal.signal(signal.SIGALRM, interrupt)
+    start = time.perf_counter()
+    try:
+        try:
+            if timeout:
+                signal.setitimer(signal.ITIMER_REAL, timeout)
+            lox.run_file(filename, engine)
+        finally:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+    except ScriptTimeout:
+        timed_out = True
+        status = None
+    except SystemExit as stop:
+        status = stop.code
+    except OSError as error:
+        errors.write(f"{error}\n")
+        status = 1
+    except Exception as error:
+        errors.write(f"{type(error).__name__}: {error}\n")
+        status = 1
+
+    return {
+        "path": filename,
+        "status": status,
+        "timed_out": timed_out,
+        "seconds": round(time.perf_counter() - start, 6),
+        "stdout": output.getvalue(),
+        "stderr": errors.getvalue(),
+    }
+
+
+def killed(filename: str, seconds: float) -> dict:
+    # Whatever the script printed died with its worker.
+    return {
+        "path": filename,
+        "status": None,
+        "timed_out": True,
+        "seconds": round(seconds, 6),
+        "stdout": "",
+        "stderr": "",
+    }
+
+
+# Runs every script in its own session on a pool of worker processes and
+# reports each one's output, errors and exit status in script order. A
+# worker still busy GRACE seconds after its script's timeout is killed, and
+# the pool starts another in its place.
+def run_batch(target: str, engine: str, settings: dict, jobs: int | None = None,
+              timeout: float = DEFAULT_TIMEOUT) -> dict:
+    scripts = find_scripts(target)
+    preload()
+    start = time.perf_counter()
+    started = Queue()
+    results: list[dict | None] = [None] * len(scripts)
+    with Pool(jobs, initializer=start_worker, initargs=(started,)) as pool:
+        pending = {
+            index: pool.apply_async(
+                run_script, ((index, script, engine, settings, timeout),))
+            for index, script in enumerate(scripts)
+        }
+        # Scripts by index, with the worker running each and its start.
+        running: dict[int, tuple[int, float]] = {}
+        while pending:
+            try:
+                index, pid, began = started.get(timeout=0.05)
+                running[index] = (pid, began)
+                while True:
+                    index, pid, began = started.get_nowait()
+                    running[index] = (pid, began)
+            except Empty:
+                pass
+
+            now = time.time()
+            for index, (pid, began) in list(running.items()):
+                if pending[index].ready():
+                    results[index] = pending[index].get()
+                elif timeout and now - began > timeout + GRACE:
+                    try:
+                        os.kill(pid, signal.SIGKILL)
+                    except ProcessLookupError:
+                        pass
+                    results[index] = killed(scripts[index], now - began)
+                else:
+                    continue
+                del pending[index]
+                del running[index]
+
+    statuses = [result["status"] for result in results]
+    return {
+        "scripts": results,
+        "summary": {
+            "total": len(results),
+            "passed": statuses.count(0),
+            "compile_errors": statuses.count(65),
+            "runtime_errors": statuses.count(70),
+            "timed_out": statuses.count(None),
+            "failed": sum(status not in (0, 65, 70, None) for status in statuses),
+            "seconds": round(time.perf_counter() - start, 6),
+        },
+    }
@@ -2,16 +2,91 @@ import sys
 from lox.lox import Lox
 
 
-def cli():
-    if len(sys.argv) < 3:
-        print("Usage: ./program <command> <filename>", file=sys.stderr)
+def split_args(argv: list[str]):
+    args = [arg for arg in argv if not arg.startswith("--")]
+    options = [arg for arg in argv if arg.startswith("--")]
+    return args, options
+
+
+def parse_options(options: list[str]) -> tuple[str, dict]:
+    engine = "tree"
+    settings = {}
+    for option in options:
+        if option.startswith("--engine="):
+            engine = option[len("--engine="):]
+        elif option.startswith("--max-frames="):
+            value = option[len("--max-frames="):]
+            if not value.isdigit() or int(value) < 1:
+                print(f"Invalid frame limit: {value}", file=sys.stderr)
+                exit(1)
+            settings["max_frames"] = int(value)
+        elif option == "--stream":
+            settings["stream"] = True
+        elif option == "--no-cache":
+            settings["cache"] = False
+        else:
+            print(f"Unknown option: {option}", file=sys.stderr)
+            exit(1)
+
+    if engine not in Lox.engines:
+        print(f"Unknown engine: {engine}", file=sys.stderr)
+        exit(1)
+    return engine, settings
+
+
+def batch(target: str, options: list[str]):
+    import json
+    from app.batch import run_batch, DEFAULT_TIMEOUT
+
+    jobs = None
+    timeout = DEFAULT_TIMEOUT
+    lox_options = []
+    for option in options:
+        if option.startswith("--jobs="):
+            value = option[len("--jobs="):]
+            if not value.isdigit() or int(value) < 1:
+                print(f"Invalid job count: {value}", file=sys.stderr)
+                exit(1)
+            jobs = int(value)
+        elif option.startswith("--timeout="):
+            value = option[len("--timeout="):]
+            try:
+                timeout = float(value)
+            except ValueError:
+                timeout = -1.0
+            if not timeout >= 0:
+                print(f"Invalid timeout: {value}", file=sys.stderr)
+                exit(1)
+        else:
+            lox_options.append(option)
+    engine, settings = parse_options(lox_options)
+
+    try:
+        report = run_batch(target, engine, settings, jobs, timeout)
+    except OSError as error:
+        print(f"Cannot read {target}: {error.strerror}", file=sys.stderr)
+        exit(1)
+    json.dump(report, sys.stdout, indent=2)
+    print()
+
+
+def cli(argv: list[str] | None = None):
+    args, options = split_args(sys.argv[1:] if argv is None else argv)
+    if len(args) < 2:
+        print("Usage: ./program <command> <filename> [--engine=<engine>] [--max-frames=<n> (vm only)] [--stream] [--no-cache]", file=sys.stderr)
         exit(1)
 
-    command = sys.argv[1]
-    filename = sys.argv[2]
+    command = args[0]
+    filename = args[1]
+    if command == "batch":
+        batch(filename, options)
+        return
+    engine, settings = parse_options(options)
 
-    lox = Lox()
-    lox.run_cmd(command, filename)
+    # Each command is run by a process of its own, here or in a server's
+    # forked child.
+    lox = Lox(freeze=True, **settings)
+    lox.run_cmd(command, filename, engine)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,66 @@
+import os
+import sys
+# The socket module itself imports enum and selectors, which would take
+# longer than the rest of the client.
+from _socket import socket, AF_UNIX, SOCK_STREAM
+from app.protocol import (ARGUMENT, DIRECTORY, SOURCE, RUN, STDOUT, STDERR, EXIT,
+                          STATUS, default_socket, send_frame, read_frame)
+
+
+# Takes the same arguments as app.cli and has a running app.server run the
+# command, then writes out its output and exits with its status. A filename
+# of "-" sends the source read from stdin instead. Without a server, the
+# command runs here.
+def client():
+    path = default_socket()
+    argv = []
+    for arg in sys.argv[1:]:
+        if arg.startswith("--socket="):
+            path = arg[len("--socket="):]
+        else:
+            argv.append(arg)
+
+    # A socket someone else made could be another user's server, which
+    # would be sent the source and stdin.
+    try:
+        owner = os.stat(path).st_uid
+    except FileNotFoundError:
+        owner = None
+    if owner is not None and owner != os.getuid():
+        print(f"Not connecting to {path}: it belongs to another user.", file=sys.stderr)
+        exit(1)
+
+    connection = socket(AF_UNIX, SOCK_STREAM)
+    try:
+        connection.connect(path)
+    except (FileNotFoundError, ConnectionRefusedError):
+        connection.close()
+        from app.cli import cli
+        cli(argv)
+        return
+
+    for arg in argv:
+        send_frame(connection, ARGUMENT, arg.encode())
+    send_frame(connection, DIRECTORY, os.getcwd().encode())
+    if "-" in argv:
+        send_frame(connection, SOURCE, sys.stdin.buffer.read())
+    send_frame(connection, RUN, b"")
+
+    with open(connection.fileno(), "rb", closefd=False) as reader:
+        while (frame := read_frame(reader)) is not None:
+            kind, data = frame
+            if kind == STDOUT:
+                sys.stdout.buffer.write(data)
+            elif kind == STDERR:
+                sys.stdout.flush()
+                sys.stderr.buffer.write(data)
+                sys.stderr.flush()
+            elif kind == EXIT:
+                sys.stdout.flush()
+                exit(STATUS.unpack(data)[0])
+    print("Lost connection to the server.", file=sys.stderr)
+    exit(1)
+
+
+if __name__ == "__main__":
+    client()
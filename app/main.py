@@ -1,17 +1,20 @@
 import sys
-from lox.ast_printer import AstPrinter
 from lox.lox import Lox
+from app.cli import split_args, parse_options
 
 
 def main():
-    lox = Lox()
-    if len(sys.argv) > 1:
+    args, options = split_args(sys.argv[1:])
+    engine, settings = parse_options(options)
+
+    lox = Lox(**settings)
+    if len(args) > 0:
         # File execution mode
-        filename = sys.argv[1]
-        lox.run_file(filename)
+        filename = args[0]
+        lox.run_file(filename, engine)
     else:
         # Interactive mode (REPL)
-        lox.run_prompt()
+        lox.run_prompt(engine)
 
 
 if __name__ == "__main__":
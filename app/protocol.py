@@ -0,0 +1,41 @@
+import os
+import struct
+
+# Client and server talk in frames: a one-byte id, a payload length, then
+# the payload. A request is its arguments, working directory and optionally
+# its source, ended by RUN. The reply is output as it is written, ended by
+# the exit status.
+FRAME = struct.Struct(">cI")
+ARGUMENT = b"a"
+DIRECTORY = b"d"
+SOURCE = b"s"
+RUN = b"r"
+STDOUT = b"o"
+STDERR = b"e"
+EXIT = b"x"
+STATUS = struct.Struct(">i")
+
+
+def default_socket() -> str:
+    # Per user, like the AST cache, so that nobody else can listen where the
+    # client connects: the user's runtime directory, or else a directory of
+    # their own in the temporary directory, which the server makes 0700.
+    directory = os.environ.get("XDG_RUNTIME_DIR")
+    if not directory:
+        directory = os.path.join(os.environ.get("TMPDIR", "/tmp"), f"pylox-{os.getuid()}")
+    return os.path.join(directory, "pylox.sock")
+
+
+def send_frame(connection, kind: bytes, data: bytes):
+    connection.sendall(FRAME.pack(kind, len(data)) + data)
+
+
+def read_frame(reader) -> tuple[bytes, bytes] | None:
+    header = reader.read(FRAME.size)
+    if len(header) < FRAME.size:
+        return None
+    kind, size = FRAME.unpack(header)
+    data = reader.read(size)
+    if len(data) < size:
+        return None
+    return kind, data
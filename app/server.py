@@ -0,0 +1,130 @@
+import io
+import os
+import socketserver
+import sys
+import tempfile
+import traceback
+from app.cli import cli
+from app.protocol import (ARGUMENT, DIRECTORY, SOURCE, RUN, STDOUT, STDERR, EXIT,
+                          STATUS, default_socket, send_frame, read_frame)
+from lox.lox import preload
+
+
+class FrameWriter(io.RawIOBase):
+
+    def __init__(self, connection, kind: bytes, flush_first=None):
+        self.connection = connection
+        self.kind = kind
+        # Flushed first, so that what was written to it arrives first.
+        self.flush_first = flush_first
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        if self.flush_first is not None:
+            self.flush_first.flush()
+        send_frame(self.connection, self.kind, bytes(data))
+        return len(data)
+
+
+# Runs one command per connection. The server forks a child for each one,
+# so a command starts from the modules the server already imported but gets
+# its own globals and error flags, and nothing it does outlives it.
+class CommandHandler(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        request = self.read_request()
+        if request is None:
+            return
+        connection = self.request
+        sys.stdout = io.TextIOWrapper(
+            io.BufferedWriter(FrameWriter(connection, STDOUT)), encoding="utf-8")
+        sys.stderr = io.TextIOWrapper(
+            FrameWriter(connection, STDERR, sys.stdout), encoding="utf-8",
+            write_through=True)
+        try:
+            status = self.run(request)
+        finally:
+            sys.stdout.flush()
+        send_frame(connection, EXIT, STATUS.pack(status))
+
+    def read_request(self) -> dict | None:
+        request = {"argv": []}
+        while (frame := read_frame(self.rfile)) is not None:
+            kind, data = frame
+            if kind == RUN:
+                return request
+            if kind == ARGUMENT:
+                request["argv"].append(data.decode())
+            elif kind == DIRECTORY:
+                request["cwd"] = data.decode()
+            elif kind == SOURCE:
+                request["source"] = data.decode()
+        return None
+
+    def run(self, request: dict) -> int:
+        try:
+            os.chdir(request["cwd"])
+            if "source" not in request:
+                cli(request["argv"])
+                return 0
+            # Source sent by the client is run from a file only this command
+            # sees, which is not worth caching.
+            with tempfile.TemporaryDirectory() as directory:
+                filename = os.path.join(directory, "stdin.lox")
+                with open(filename, "w") as file:
+                    file.write(request["source"])
+                argv = [filename if arg == "-" else arg for arg in request["argv"]]
+                cli(argv + ["--no-cache"])
+        except SystemExit as stop:
+            if stop.code is None:
+                return 0
+            if isinstance(stop.code, int):
+                return stop.code
+            print(stop.code, file=sys.stderr)
+            return 1
+        except Exception:
+            traceback.print_exc()
+            return 1
+        return 0
+
+
+# socketserver.ForkingUnixStreamServer, which needs Python 3.12.
+class Server(socketserver.ForkingMixIn, socketserver.UnixStreamServer):
+    pass
+
+
+def serve(path: str):
+    preload()
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    # Another user owning the directory could swap the socket for their own.
+    if os.stat(directory).st_uid not in (os.getuid(), 0):
+        print(f"Not serving in {directory}: it belongs to another user.", file=sys.stderr)
+        exit(1)
+    if os.path.exists(path):
+        os.unlink(path)
+    with Server(path, CommandHandler) as server:
+        print(f"Serving on {path}", file=sys.stderr)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            os.unlink(path)
+
+
+def main():
+    path = default_socket()
+    for option in sys.argv[1:]:
+        if option.startswith("--socket="):
+            path = option[len("--socket="):]
+        else:
+            print("Usage: python -m app.server [--socket=<path>]", file=sys.stderr)
+            exit(1)
+    serve(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+import gc
+import hashlib
+import os
+import pickle
+import sys
+import threading
+from lox.stmt import Stmt
+
+# Written first in every entry, before the key.
+MAGIC = b"pylox-ast\n"
+
+_version: str | None = None
+
+
+def interpreter_version() -> str:
+    # Any change to the interpreter's own source may change the trees it
+    # builds. Reading all of it on every run would cost more than the cache
+    # saves on small scripts, so the version is a digest of each file's
+    # size and modification time, taken once per process.
+    global _version
+    if _version is None:
+        digest = hashlib.sha256(sys.version.encode())
+        package = os.path.dirname(os.path.abspath(__file__))
+        for entry in sorted(os.scandir(package), key=lambda entry: entry.name):
+            if entry.name.endswith(".py"):
+                stat = entry.stat()
+                digest.update(f"{entry.name}\0{stat.st_size}\0{stat.st_mtime_ns}\0".encode())
+        _version = digest.hexdigest()
+    return _version
+
+
+# Loads running at once on several threads share one pause of the
+# collector. The first to start records whether it was on, and the last to
+# finish turns it back on only if it was.
+_gc_lock = threading.Lock()
+_gc_pauses = 0
+_gc_was_enabled = False
+
+
+def _pause_gc():
+    global _gc_pauses, _gc_was_enabled
+    with _gc_lock:
+        if _gc_pauses == 0:
+            _gc_was_enabled = gc.isenabled()
+            gc.disable()
+        _gc_pauses += 1
+
+
+def _resume_gc():
+    global _gc_pauses
+    with _gc_lock:
+        _gc_pauses -= 1
+        if _gc_pauses == 0 and _gc_was_enabled:
+            gc.enable()
+
+
+def cache_directory() -> str:
+    # Per user, so that nobody else can put an entry where it will be read.
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "pylox")
+
+
+# Keeps the resolved and optimized statements of a script in the user's
+# cache directory, one entry per script path. An entry starts with a header
+# holding the interpreter version and a hash of the source it was built
+# from, and the statements are only unpickled when the header matches, so
+# an entry written by anything else is never run. Anything that does not
+# match, or does not load, is ignored and rebuilt.
+class AstCache:
+
+    def __init__(self, filename: str, directory: str | None = None):
+        path = os.path.abspath(filename)
+        self.directory = directory or cache_directory()
+        digest = hashlib.sha256(path.encode()).hexdigest()[:16]
+        self.path = os.path.join(
+            self.directory, f"{os.path.basename(path)}-{digest}.pickle")
+
+    def header(self, source: str) -> bytes:
+        return (MAGIC + interpreter_version().encode() +
+                hashlib.sha256(source.encode()).hexdigest().encode())
+
+    def load(self, source: str) -> list[Stmt] | None:
+        header = self.header(source)
+        # A tree holds no cycles, so the collector has nothing to find in it.
+        # It stays off while the tree is built, and is left as it was found
+        # however loading ends.
+        _pause_gc()
+        try:
+            with open(self.path, "rb") as file:
+                if file.read(len(header)) != header:
+                    return None
+                statements = pickle.load(file)
+        except Exception:
+            return None
+        finally:
+            _resume_gc()
+        if not isinstance(statements, list):
+            return None
+        return statements
+
+    def store(self, source: str, statements: list[Stmt]):
+        try:
+            data = self.header(source) + pickle.dumps(
+                statements, pickle.HIGHEST_PROTOCOL)
+            os.makedirs(self.directory, mode=0o700, exist_ok=True)
+            # Written aside and renamed into place, so concurrent runs never
+            # see a partial entry.
+            temporary = f"{self.path}.{os.getpid()}.tmp"
+            try:
+                with open(temporary, "wb") as file:
+                    file.write(data)
+                os.replace(temporary, self.path)
+            except BaseException:
+                os.unlink(temporary)
+                raise
+        except (OSError, RecursionError, pickle.PicklingError):
+            # Caching is only an optimization.
+            pass
@@ -0,0 +1,129 @@
+from array import array
+from enum import IntEnum
+
+
+# STORE_ and POP_JUMP_IF_FALSE pop the value that SET_ and JUMP_IF_FALSE
+# leave on the stack, saving the POP after an assignment statement or the
+# condition of an if or while.
+class OpCode(IntEnum):
+    CONSTANT = 0
+    NIL = 1
+    TRUE = 2
+    FALSE = 3
+    POP = 4
+    GET_LOCAL = 5
+    SET_LOCAL = 6
+    STORE_LOCAL = 7
+    GET_GLOBAL = 8
+    DEFINE_GLOBAL = 9
+    SET_GLOBAL = 10
+    STORE_GLOBAL = 11
+    GET_UPVALUE = 12
+    SET_UPVALUE = 13
+    STORE_UPVALUE = 14
+    EQUAL = 15
+    NOT_EQUAL = 16
+    GREATER = 17
+    GREATER_EQUAL = 18
+    LESS = 19
+    LESS_EQUAL = 20
+    ADD = 21
+    SUBTRACT = 22
+    MULTIPLY = 23
+    DIVIDE = 24
+    NOT = 25
+    NEGATE = 26
+    PRINT = 27
+    JUMP = 28
+    JUMP_IF_FALSE = 29
+    POP_JUMP_IF_FALSE = 30
+    LOOP = 31
+    CALL = 32
+    CLOSURE = 33
+    CLOSE_UPVALUE = 34
+    RETURN = 35
+
+
+# Instructions followed by a one byte operand: a stack slot, an upvalue index
+# or an argument count.
+BYTE_OPERAND = (OpCode.GET_LOCAL, OpCode.SET_LOCAL, OpCode.STORE_LOCAL,
+                OpCode.GET_UPVALUE, OpCode.SET_UPVALUE, OpCode.STORE_UPVALUE,
+                OpCode.CALL)
+
+# Instructions followed by a two byte operand: a constant index or a jump
+# offset.
+SHORT_OPERAND = (OpCode.CONSTANT, OpCode.GET_GLOBAL, OpCode.DEFINE_GLOBAL,
+                 OpCode.SET_GLOBAL, OpCode.STORE_GLOBAL, OpCode.JUMP,
+                 OpCode.JUMP_IF_FALSE, OpCode.POP_JUMP_IF_FALSE, OpCode.LOOP,
+                 OpCode.CLOSURE)
+
+
+class Chunk:
+    def __init__(self):
+        self.code = array('B')
+        self.lines = array('I')
+        self.constants: list[object] = []
+        self.constant_indexes: dict[tuple, int] = {}
+
+    def write(self, byte: int, line: int):
+        self.code.append(byte)
+        self.lines.append(line)
+
+    def add_constant(self, value: object) -> int:
+        # Numbers and names repeat a lot, so share their pool entries. Floats
+        # are keyed by their exact bits to keep -0.0 apart from 0.0.
+        # Functions are always added fresh.
+        if type(value) is float:
+            key = (float, value.hex())
+        elif type(value) is str:
+            key = (str, value)
+        else:
+            self.constants.append(value)
+            return len(self.constants) - 1
+
+        index = self.constant_indexes.get(key)
+        if index is None:
+            index = self.constant_indexes[key] = len(self.constants)
+            self.constants.append(value)
+        return index
+
+    def disassemble(self, name: str):
+        print(f"== {name} ==")
+        offset = 0
+        while offset < len(self.code):
+            offset = self.disassemble_instruction(offset)
+
+    def disassemble_instruction(self, offset: int) -> int:
+        line = (" " * 3 + "|" if offset > 0 and self.lines[offset] == self.lines[offset - 1]
+                else f"{self.lines[offset]:4}")
+        op = OpCode(self.code[offset])
+        text = f"{offset:04} {line} {op.name:<18}"
+
+        if op in BYTE_OPERAND:
+            print(f"{text} {self.code[offset + 1]:4}")
+            return offset + 2
+
+        if op not in SHORT_OPERAND:
+            print(text)
+            return offset + 1
+
+        operand = (self.code[offset + 1] << 8) | self.code[offset + 2]
+        if op in (OpCode.JUMP, OpCode.JUMP_IF_FALSE, OpCode.POP_JUMP_IF_FALSE):
+            print(f"{text} {offset} -> {offset + 3 + operand}")
+            return offset + 3
+        if op == OpCode.LOOP:
+            print(f"{text} {offset} -> {offset + 3 - operand}")
+            return offset + 3
+
+        constant = self.constants[operand]
+        print(f"{text} {operand:4} '{constant}'")
+        if op != OpCode.CLOSURE:
+            return offset + 3
+
+        offset += 3
+        for _ in range(constant.upvalue_count):
+            is_local = self.code[offset]
+            index = self.code[offset + 1]
+            print(f"{offset:04}    |   {'local' if is_local else 'upvalue'} {index}")
+            offset += 2
+        return offset
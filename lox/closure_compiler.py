@@ -0,0 +1,572 @@
+from lox.expr import Expr, Literal, Grouping, Unary, Binary, Variable, Assign, Logical, Call
+from lox.token import TokenType, Token
+from lox.error import LoxRuntimeError, NativeError
+from lox.stmt import Stmt, Block, Expression, If, Print, Var, While, Function, Return
+from lox.environment import Environment
+from lox.lox_callable import LoxCallable
+
+
+# Compiles the resolved tree once into nested Python closures taking the
+# current environment. Statement closures return None to fall through to the
+# next statement, or a one-element tuple holding the value of a `return`.
+class ClosureCompiler(Expr.Visitor, Stmt.Visitor):
+
+    def __init__(self, interpreter):
+        self.interpreter = interpreter
+        self.scope_depth = 0
+
+    def interpret(self, statements: list[Stmt]):
+        try:
+            program = self.compile_block(statements)
+            program(self.interpreter.lox_globals)
+        except LoxRuntimeError as error:
+            self.interpreter.reporter.runtime_error(error)
+
+    def compile(self, node: Expr | Stmt):
+        return node.accept(self)
+
+    def compile_block(self, statements: list[Stmt]):
+        compiled = tuple(self.compile(statement) for statement in statements)
+
+        if len(compiled) == 1:
+            return compiled[0]
+
+        def block(env):
+            for statement in compiled:
+                completion = statement(env)
+                if completion is not None:
+                    return completion
+            return None
+        return block
+
+    def compile_condition(self, expr: Expr):
+        condition = self.compile(expr)
+
+        # Comparisons and `!` always produce a bool, so Python truthiness is
+        # Lox truthiness and the check can be skipped.
+        if is_boolean(expr):
+            return condition
+
+        def truthy(env):
+            value = condition(env)
+            return value is not None and value is not False
+        return truthy
+
+    def visit_stmt_expression(self, stmt: Expression):
+        expression = self.compile(stmt.expression)
+
+        def execute(env):
+            expression(env)
+        return execute
+
+    def visit_stmt_print(self, stmt: Print):
+        expression = self.compile(stmt.expression)
+        stringify = self.interpreter.stringify
+        write = self.interpreter.output.print
+
+        def execute(env):
+            write(stringify(expression(env)))
+        return execute
+
+    def visit_stmt_var(self, stmt: Var):
+        if stmt.initializer is not None:
+            initializer = self.compile(stmt.initializer)
+        else:
+            def initializer(env):
+                return None
+
+        if self.scope_depth == 0:
+            values = self.interpreter.lox_globals.values
+            name = stmt.name.lexeme
+
+            def execute(env):
+                values[name] = initializer(env)
+            return execute
+
+        def execute(env):
+            env.values.append(initializer(env))
+        return execute
+
+    def visit_stmt_block(self, stmt: Block):
+        if stmt.bare:
+            return self.compile_block(stmt.statements)
+
+        self.scope_depth += 1
+        body = self.compile_block(stmt.statements)
+        self.scope_depth -= 1
+
+        def execute(env):
+            return body(Environment(env))
+        return execute
+
+    def visit_stmt_if(self, stmt: If):
+        condition = self.compile_condition(stmt.condition)
+        then_branch = self.compile(stmt.then_branch)
+
+        if stmt.else_branch is None:
+            def execute(env):
+                if condition(env):
+                    return then_branch(env)
+                return None
+            return execute
+
+        else_branch = self.compile(stmt.else_branch)
+
+        def execute(env):
+            if condition(env):
+                return then_branch(env)
+            return else_branch(env)
+        return execute
+
+    def visit_stmt_while(self, stmt: While):
+        condition = self.compile_condition(stmt.condition)
+
+        if stmt.reuse:
+            # A for loop's increment runs after the body, outside it.
+            block, increment = stmt.body, None
+            if block.bare:
+                block, increment = block.statements
+            self.scope_depth += 1
+            body = self.compile_block(block.statements)
+            self.scope_depth -= 1
+
+            if increment is not None:
+                increment = self.compile(increment)
+
+                def execute(env):
+                    scope = Environment(env)
+                    values = scope.values
+                    while condition(env):
+                        values.clear()
+                        completion = body(scope)
+                        if completion is not None:
+                            return completion
+                        increment(env)
+                    return None
+                return execute
+
+            def execute(env):
+                scope = Environment(env)
+                values = scope.values
+                while condition(env):
+                    values.clear()
+                    completion = body(scope)
+                    if completion is not None:
+                        return completion
+                return None
+            return execute
+
+        body = self.compile(stmt.body)
+
+        def execute(env):
+            while condition(env):
+                completion = body(env)
+                if completion is not None:
+                    return completion
+            return None
+        return execute
+
+    def visit_stmt_function(self, stmt: Function):
+        self.scope_depth += 1
+        body = self.compile_block(stmt.body)
+        self.scope_depth -= 1
+
+        name = stmt.name.lexeme
+        arity = len(stmt.params)
+
+        if self.scope_depth == 0:
+            values = self.interpreter.lox_globals.values
+
+            def execute(env):
+                values[name] = CompiledFunction(name, arity, body, env)
+            return execute
+
+        def execute(env):
+            env.values.append(CompiledFunction(name, arity, body, env))
+        return execute
+
+    def visit_stmt_return(self, stmt: Return):
+        if stmt.value is None:
+            completion = (None,)
+
+            def execute(env):
+                return completion
+            return execute
+
+        value = self.compile(stmt.value)
+
+        def execute(env):
+            return (value(env),)
+        return execute
+
+    def visit_expr_literal(self, expr: Literal):
+        value = expr.value
+
+        def evaluate(env):
+            return value
+        return evaluate
+
+    def visit_expr_grouping(self, expr: Grouping):
+        return self.compile(expr.expression)
+
+    def visit_expr_variable(self, expr: Variable):
+        slot = expr.slot
+
+        if expr.depth is None:
+            values = self.interpreter.lox_globals.values
+            name = expr.name
+
+            def evaluate(env):
+                try:
+                    return values[name.lexeme]
+                except KeyError:
+                    raise LoxRuntimeError(
+                        name, f"Undefined variable '{name.lexeme}'.") from None
+            return evaluate
+
+        if expr.depth == 0:
+            def evaluate(env):
+                return env.values[slot]
+        elif expr.depth == 1:
+            def evaluate(env):
+                return env.enclosing.values[slot]
+        else:
+            depth = expr.depth
+
+            def evaluate(env):
+                for _ in range(depth):
+                    env = env.enclosing
+                return env.values[slot]
+        return evaluate
+
+    def visit_expr_assign(self, expr: Assign):
+        value = self.compile(expr.value)
+        slot = expr.slot
+
+        if expr.depth is None:
+            values = self.interpreter.lox_globals.values
+            name = expr.name
+
+            def evaluate(env):
+                result = value(env)
+                if name.lexeme not in values:
+                    raise LoxRuntimeError(
+                        name, f"Undefined variable '{name.lexeme}'.")
+                values[name.lexeme] = result
+                return result
+            return evaluate
+
+        if expr.depth == 0:
+            def evaluate(env):
+                result = env.values[slot] = value(env)
+                return result
+        else:
+            depth = expr.depth
+
+            def evaluate(env):
+                result = value(env)
+                for _ in range(depth):
+                    env = env.enclosing
+                env.values[slot] = result
+                return result
+        return evaluate
+
+    def visit_expr_logical(self, expr: Logical):
+        left = self.compile(expr.left)
+        right = self.compile(expr.right)
+
+        if expr.operator.token_type == TokenType.OR:
+            def evaluate(env):
+                value = left(env)
+                if value is not None and value is not False:
+                    return value
+                return right(env)
+        else:
+            def evaluate(env):
+                value = left(env)
+                if value is None or value is False:
+                    return value
+                return right(env)
+        return evaluate
+
+    def visit_expr_unary(self, expr: Unary):
+        right = self.compile(expr.right)
+        operator = expr.operator
+
+        if operator.token_type == TokenType.MINUS:
+            def evaluate(env):
+                value = right(env)
+                if type(value) is float:
+                    return -value
+                raise LoxRuntimeError(operator, "Operand must be a number.")
+            return evaluate
+
+        def evaluate(env):
+            value = right(env)
+            return value is None or value is False
+        return evaluate
+
+    def visit_expr_binary(self, expr: Binary):
+        left = self.compile(expr.left)
+        operator = expr.operator
+        token_type = operator.token_type
+
+        if token_type == TokenType.EQUAL_EQUAL:
+            right = self.compile(expr.right)
+
+            def evaluate(env):
+                return left(env) == right(env)
+            return evaluate
+        if token_type == TokenType.BANG_EQUAL:
+            right = self.compile(expr.right)
+
+            def evaluate(env):
+                return left(env) != right(env)
+            return evaluate
+
+        if token_type == TokenType.PLUS:
+            right = self.compile(expr.right)
+
+            def evaluate(env):
+                a = left(env)
+                b = right(env)
+                kind = type(a)
+                if kind is type(b) and (kind is float or kind is str):
+                    return a + b
+                raise LoxRuntimeError(
+                    operator, "Operands must be two numbers or two strings.")
+            return evaluate
+
+        # A number literal on the right, as in `i < 10` or `n - 1`, only
+        # needs the left operand checked.
+        if isinstance(expr.right, Literal) and type(expr.right.value) is float:
+            return NUMBER_CONSTANT_OPERATORS[token_type](left, expr.right.value, operator)
+        return NUMBER_OPERATORS[token_type](left, self.compile(expr.right), operator)
+
+    def visit_expr_call(self, expr: Call):
+        callee = self.compile(expr.callee)
+        arguments = tuple(self.compile(argument)
+                          for argument in expr.arguments)
+        paren = expr.paren
+        interpreter = self.interpreter
+
+        def evaluate(env):
+            function = callee(env)
+            values = [argument(env) for argument in arguments]
+
+            if type(function) is CompiledFunction:
+                if len(values) != function.parameters:
+                    raise LoxRuntimeError(
+                        paren, f"Expected {function.parameters} arguments but got {len(values)}.")
+                try:
+                    completion = function.body(
+                        Environment(function.closure, values))
+                except RecursionError:
+                    raise LoxRuntimeError(paren, "Stack overflow.") from None
+                return None if completion is None else completion[0]
+
+            if not isinstance(function, LoxCallable):
+                raise LoxRuntimeError(
+                    paren, "Can only call functions and classes.")
+
+            if len(values) != function.arity():
+                raise LoxRuntimeError(
+                    paren, f"Expected {function.arity()} arguments but got {len(values)}.")
+            try:
+                return function.call(interpreter, values)
+            except RecursionError:
+                raise LoxRuntimeError(paren, "Stack overflow.") from None
+            except NativeError as error:
+                raise LoxRuntimeError(paren, error.message) from None
+        return evaluate
+
+
+class CompiledFunction(LoxCallable):
+
+    def __init__(self, name: str, parameters: int, body, closure: Environment):
+        self.name = name
+        self.parameters = parameters
+        self.body = body
+        self.closure = closure
+
+    def call(self, interpreter, arguments):
+        completion = self.body(Environment(self.closure, list(arguments)))
+        return None if completion is None else completion[0]
+
+    def arity(self):
+        return self.parameters
+
+    def __str__(self):
+        return f"<fn {self.name}>"
+
+
+def is_boolean(expr: Expr) -> bool:
+    if isinstance(expr, Grouping):
+        return is_boolean(expr.expression)
+    if isinstance(expr, Unary):
+        return expr.operator.token_type == TokenType.BANG
+    if isinstance(expr, Binary):
+        return expr.operator.token_type in COMPARISONS
+    return False
+
+
+COMPARISONS = (TokenType.GREATER, TokenType.GREATER_EQUAL, TokenType.LESS,
+               TokenType.LESS_EQUAL, TokenType.EQUAL_EQUAL, TokenType.BANG_EQUAL)
+
+
+def number_operands_error(operator: Token):
+    return LoxRuntimeError(operator, "Operands must be numbers.")
+
+
+def subtract(left, right, operator: Token):
+    def evaluate(env):
+        a = left(env)
+        b = right(env)
+        if type(a) is float and type(b) is float:
+            return a - b
+        raise number_operands_error(operator)
+    return evaluate
+
+
+def multiply(left, right, operator: Token):
+    def evaluate(env):
+        a = left(env)
+        b = right(env)
+        if type(a) is float and type(b) is float:
+            return a * b
+        raise number_operands_error(operator)
+    return evaluate
+
+
+def divide(left, right, operator: Token):
+    def evaluate(env):
+        a = left(env)
+        b = right(env)
+        if type(a) is float and type(b) is float:
+            return a / b
+        raise number_operands_error(operator)
+    return evaluate
+
+
+def greater(left, right, operator: Token):
+    def evaluate(env):
+        a = left(env)
+        b = right(env)
+        if type(a) is float and type(b) is float:
+            return a > b
+        raise number_operands_error(operator)
+    return evaluate
+
+
+def greater_equal(left, right, operator: Token):
+    def evaluate(env):
+        a = left(env)
+        b = right(env)
+        if type(a) is float and type(b) is float:
+            return a >= b
+        raise number_operands_error(operator)
+    return evaluate
+
+
+def less(left, right, operator: Token):
+    def evaluate(env):
+        a = left(env)
+        b = right(env)
+        if type(a) is float and type(b) is float:
+            return a < b
+        raise number_operands_error(operator)
+    return evaluate
+
+
+def less_equal(left, right, operator: Token):
+    def evaluate(env):
+        a = left(env)
+        b = right(env)
+        if type(a) is float and type(b) is float:
+            return a <= b
+        raise number_operands_error(operator)
+    return evaluate
+
+
+def subtract_constant(left, b: float, operator: Token):
+    def evaluate(env):
+        a = left(env)
+        if type(a) is float:
+            return a - b
+        raise number_operands_error(operator)
+    return evaluate
+
+
+def multiply_constant(left, b: float, operator: Token):
+    def evaluate(env):
+        a = left(env)
+        if type(a) is float:
+            return a * b
+        raise number_operands_error(operator)
+    return evaluate
+
+
+def divide_constant(left, b: float, operator: Token):
+    def evaluate(env):
+        a = left(env)
+        if type(a) is float:
+            return a / b
+        raise number_operands_error(operator)
+    return evaluate
+
+
+def greater_constant(left, b: float, operator: Token):
+    def evaluate(env):
+        a = left(env)
+        if type(a) is float:
+            return a > b
+        raise number_operands_error(operator)
+    return evaluate
+
+
+def greater_equal_constant(left, b: float, operator: Token):
+    def evaluate(env):
+        a = left(env)
+        if type(a) is float:
+            return a >= b
+        raise number_operands_error(operator)
+    return evaluate
+
+
+def less_constant(left, b: float, operator: Token):
+    def evaluate(env):
+        a = left(env)
+        if type(a) is float:
+            return a < b
+        raise number_operands_error(operator)
+    return evaluate
+
+
+def less_equal_constant(left, b: float, operator: Token):
+    def evaluate(env):
+        a = left(env)
+        if type(a) is float:
+            return a <= b
+        raise number_operands_error(operator)
+    return evaluate
+
+
+NUMBER_OPERATORS = {
+    TokenType.MINUS: subtract,
+    TokenType.STAR: multiply,
+    TokenType.SLASH: divide,
+    TokenType.GREATER: greater,
+    TokenType.GREATER_EQUAL: greater_equal,
+    TokenType.LESS: less,
+    TokenType.LESS_EQUAL: less_equal,
+}
+
+NUMBER_CONSTANT_OPERATORS = {
+    TokenType.MINUS: subtract_constant,
+    TokenType.STAR: multiply_constant,
+    TokenType.SLASH: divide_constant,
+    TokenType.GREATER: greater_constant,
+    TokenType.GREATER_EQUAL: greater_equal_constant,
+    TokenType.LESS: less_constant,
+    TokenType.LESS_EQUAL: less_equal_constant,
+}
@@ -0,0 +1,352 @@
+from lox.chunk import Chunk, OpCode
+from lox.expr import Expr, Literal, Grouping, Unary, Binary, Variable, Assign, Logical, Call
+from lox.stmt import Stmt, Block, Expression, If, Print, Var, While, Function, Return
+from lox.token import TokenType
+from lox.error import ErrorReporter
+from lox.vm_function import VMFunction
+
+UINT8_COUNT = 256
+UINT16_MAX = 0xFFFF
+
+
+class Local:
+    __slots__ = ("name", "depth", "is_captured")
+
+    def __init__(self, name: str, depth: int):
+        self.name = name
+        self.depth = depth
+        self.is_captured = False
+
+
+class FunctionState:
+    def __init__(self, enclosing: 'FunctionState | None', function: VMFunction):
+        self.enclosing = enclosing
+        self.function = function
+        # Slot zero holds the function being called.
+        self.locals: list[Local] = [Local("", 0)]
+        self.upvalues: list[tuple[bool, int]] = []
+        self.scope_depth = 0
+
+
+# Compiles a resolved statement list into bytecode for the VM, one chunk per
+# function. Scoping mirrors the resolver: locals live in stack slots and
+# variables of enclosing functions are reached through upvalues.
+class Compiler(Expr.Visitor, Stmt.Visitor):
+    BINARY_OPS = {
+        TokenType.PLUS: OpCode.ADD,
+        TokenType.MINUS: OpCode.SUBTRACT,
+        TokenType.STAR: OpCode.MULTIPLY,
+        TokenType.SLASH: OpCode.DIVIDE,
+        TokenType.GREATER: OpCode.GREATER,
+        TokenType.GREATER_EQUAL: OpCode.GREATER_EQUAL,
+        TokenType.LESS: OpCode.LESS,
+        TokenType.LESS_EQUAL: OpCode.LESS_EQUAL,
+        TokenType.EQUAL_EQUAL: OpCode.EQUAL,
+        TokenType.BANG_EQUAL: OpCode.NOT_EQUAL,
+    }
+
+    def __init__(self, reporter: ErrorReporter | None = None):
+        self.reporter = reporter or ErrorReporter()
+        self.current: FunctionState | None = None
+        self.line = 1
+
+    def compile(self, statements: list[Stmt]) -> VMFunction:
+        self.current = FunctionState(None, VMFunction("script", 0))
+
+        for statement in statements:
+            self.statement(statement)
+        self.emit_return()
+
+        return self.current.function
+
+    def statement(self, stmt: Stmt):
+        stmt.accept(self)
+
+    def expression(self, expr: Expr):
+        expr.accept(self)
+
+    def chunk(self) -> Chunk:
+        return self.current.function.chunk
+
+    def visit_stmt_expression(self, stmt: Expression):
+        expr = stmt.expression
+        if type(expr) is Assign:
+            self.expression(expr.value)
+            self.line = expr.name.line
+            self.named_variable(expr.name.lexeme, OpCode.STORE_LOCAL,
+                                OpCode.STORE_UPVALUE, OpCode.STORE_GLOBAL)
+            return
+
+        self.expression(expr)
+        self.emit(OpCode.POP)
+
+    def visit_stmt_print(self, stmt: Print):
+        self.expression(stmt.expression)
+        self.emit(OpCode.PRINT)
+
+    def visit_stmt_var(self, stmt: Var):
+        self.line = stmt.name.line
+        if stmt.initializer is not None:
+            self.expression(stmt.initializer)
+        else:
+            self.emit(OpCode.NIL)
+        self.define_variable(stmt.name.lexeme)
+
+    def visit_stmt_block(self, stmt: Block):
+        self.begin_scope()
+        for statement in stmt.statements:
+            self.statement(statement)
+        self.end_scope()
+
+    def visit_stmt_if(self, stmt: If):
+        self.expression(stmt.condition)
+
+        then_jump = self.emit_jump(OpCode.POP_JUMP_IF_FALSE)
+        self.statement(stmt.then_branch)
+
+        if stmt.else_branch is None:
+            self.patch_jump(then_jump)
+            return
+
+        else_jump = self.emit_jump(OpCode.JUMP)
+        self.patch_jump(then_jump)
+        self.statement(stmt.else_branch)
+        self.patch_jump(else_jump)
+
+    def visit_stmt_while(self, stmt: While):
+        loop_start = len(self.chunk().code)
+        self.expression(stmt.condition)
+
+        exit_jump = self.emit_jump(OpCode.POP_JUMP_IF_FALSE)
+        self.statement(stmt.body)
+        self.emit_loop(loop_start)
+
+        self.patch_jump(exit_jump)
+
+    def visit_stmt_function(self, stmt: Function):
+        self.line = stmt.name.line
+        # A local function is usable inside its own body, so it is declared
+        # before the body is compiled.
+        if self.current.scope_depth > 0:
+            self.add_local(stmt.name.lexeme)
+
+        function = VMFunction(stmt.name.lexeme, len(stmt.params))
+        state = FunctionState(self.current, function)
+        self.current = state
+        self.begin_scope()
+
+        for param in stmt.params:
+            self.add_local(param.lexeme)
+        for statement in stmt.body:
+            self.statement(statement)
+        self.emit_return()
+
+        self.current = state.enclosing
+        function.upvalue_count = len(state.upvalues)
+
+        self.line = stmt.name.line
+        self.emit_short(OpCode.CLOSURE, self.make_constant(function))
+        for is_local, index in state.upvalues:
+            self.emit_byte(1 if is_local else 0)
+            self.emit_byte(index)
+
+        if self.current.scope_depth == 0:
+            self.emit_short(OpCode.DEFINE_GLOBAL,
+                            self.make_constant(stmt.name.lexeme))
+
+    def visit_stmt_return(self, stmt: Return):
+        self.line = stmt.keyword.line
+        if stmt.value is None:
+            self.emit_return()
+            return
+
+        self.expression(stmt.value)
+        self.emit(OpCode.RETURN)
+
+    def visit_expr_literal(self, expr: Literal):
+        if expr.value is None:
+            self.emit(OpCode.NIL)
+        elif expr.value is True:
+            self.emit(OpCode.TRUE)
+        elif expr.value is False:
+            self.emit(OpCode.FALSE)
+        else:
+            self.emit_short(OpCode.CONSTANT, self.make_constant(expr.value))
+
+    def visit_expr_grouping(self, expr: Grouping):
+        self.expression(expr.expression)
+
+    def visit_expr_unary(self, expr: Unary):
+        self.expression(expr.right)
+
+        self.line = expr.operator.line
+        if expr.operator.token_type == TokenType.MINUS:
+            self.emit(OpCode.NEGATE)
+        else:
+            self.emit(OpCode.NOT)
+
+    def visit_expr_binary(self, expr: Binary):
+        self.expression(expr.left)
+        self.expression(expr.right)
+
+        self.line = expr.operator.line
+        self.emit(self.BINARY_OPS[expr.operator.token_type])
+
+    def visit_expr_logical(self, expr: Logical):
+        self.expression(expr.left)
+
+        if expr.operator.token_type == TokenType.AND:
+            end_jump = self.emit_jump(OpCode.JUMP_IF_FALSE)
+        else:
+            else_jump = self.emit_jump(OpCode.JUMP_IF_FALSE)
+            end_jump = self.emit_jump(OpCode.JUMP)
+            self.patch_jump(else_jump)
+
+        self.emit(OpCode.POP)
+        self.expression(expr.right)
+        self.patch_jump(end_jump)
+
+    def visit_expr_variable(self, expr: Variable):
+        self.line = expr.name.line
+        self.named_variable(expr.name.lexeme, OpCode.GET_LOCAL,
+                            OpCode.GET_UPVALUE, OpCode.GET_GLOBAL)
+
+    def visit_expr_assign(self, expr: Assign):
+        self.expression(expr.value)
+
+        self.line = expr.name.line
+        self.named_variable(expr.name.lexeme, OpCode.SET_LOCAL,
+                            OpCode.SET_UPVALUE, OpCode.SET_GLOBAL)
+
+    def visit_expr_call(self, expr: Call):
+        self.expression(expr.callee)
+        for argument in expr.arguments:
+            self.expression(argument)
+
+        self.line = expr.paren.line
+        self.emit(OpCode.CALL)
+        self.emit_byte(len(expr.arguments))
+
+    def named_variable(self, name: str, local_op: OpCode, upvalue_op: OpCode, global_op: OpCode):
+        slot = self.resolve_local(self.current, name)
+        if slot != -1:
+            self.emit(local_op)
+            self.emit_byte(slot)
+            return
+
+        index = self.resolve_upvalue(self.current, name)
+        if index != -1:
+            self.emit(upvalue_op)
+            self.emit_byte(index)
+            return
+
+        self.emit_short(global_op, self.make_constant(name))
+
+    def resolve_local(self, state: FunctionState, name: str) -> int:
+        for slot in range(len(state.locals) - 1, 0, -1):
+            if state.locals[slot].name == name:
+                return slot
+        return -1
+
+    def resolve_upvalue(self, state: FunctionState, name: str) -> int:
+        if state.enclosing is None:
+            return -1
+
+        local = self.resolve_local(state.enclosing, name)
+        if local != -1:
+            state.enclosing.locals[local].is_captured = True
+            return self.add_upvalue(state, True, local)
+
+        upvalue = self.resolve_upvalue(state.enclosing, name)
+        if upvalue != -1:
+            return self.add_upvalue(state, False, upvalue)
+
+        return -1
+
+    def add_upvalue(self, state: FunctionState, is_local: bool, index: int) -> int:
+        for i, upvalue in enumerate(state.upvalues):
+            if upvalue == (is_local, index):
+                return i
+
+        if len(state.upvalues) == UINT8_COUNT:
+            self.error("Too many closure variables in function.")
+            return 0
+
+        state.upvalues.append((is_local, index))
+        return len(state.upvalues) - 1
+
+    def add_local(self, name: str):
+        if len(self.current.locals) == UINT8_COUNT:
+            self.error("Too many local variables in function.")
+            return
+        self.current.locals.append(Local(name, self.current.scope_depth))
+
+    def define_variable(self, name: str):
+        if self.current.scope_depth > 0:
+            # The initializer's value is already sitting in the new slot.
+            self.add_local(name)
+            return
+        self.emit_short(OpCode.DEFINE_GLOBAL, self.make_constant(name))
+
+    def begin_scope(self):
+        self.current.scope_depth += 1
+
+    def end_scope(self):
+        state = self.current
+        state.scope_depth -= 1
+
+        while state.locals and state.locals[-1].depth > state.scope_depth:
+            if state.locals[-1].is_captured:
+                self.emit(OpCode.CLOSE_UPVALUE)
+            else:
+                self.emit(OpCode.POP)
+            state.locals.pop()
+
+    def make_constant(self, value: object) -> int:
+        constant = self.chunk().add_constant(value)
+        if constant > UINT16_MAX:
+            self.error("Too many constants in one chunk.")
+            return 0
+        return constant
+
+    def emit_byte(self, byte: int):
+        self.chunk().write(byte, self.line)
+
+    def emit(self, op: OpCode):
+        self.chunk().write(op, self.line)
+
+    def emit_short(self, op: OpCode, operand: int):
+        self.emit(op)
+        self.emit_byte((operand >> 8) & 0xFF)
+        self.emit_byte(operand & 0xFF)
+
+    def emit_jump(self, op: OpCode) -> int:
+        self.emit_short(op, 0xFFFF)
+        return len(self.chunk().code) - 2
+
+    def patch_jump(self, offset: int):
+        code = self.chunk().code
+        jump = len(code) - offset - 2
+
+        if jump > UINT16_MAX:
+            self.error("Too much code to jump over.")
+
+        code[offset] = (jump >> 8) & 0xFF
+        code[offset + 1] = jump & 0xFF
+
+    def emit_loop(self, loop_start: int):
+        self.emit(OpCode.LOOP)
+
+        offset = len(self.chunk().code) - loop_start + 2
+        if offset > UINT16_MAX:
+            self.error("Loop body too large.")
+
+        self.emit_byte((offset >> 8) & 0xFF)
+        self.emit_byte(offset & 0xFF)
+
+    def emit_return(self):
+        self.emit(OpCode.NIL)
+        self.emit(OpCode.RETURN)
+
+    def error(self, message: str):
+        self.reporter.error(self.line, message)
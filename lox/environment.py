@@ -1,32 +1,62 @@
+from itertools import count
 from lox.error import LoxRuntimeError
 from lox.token import Token
 
+# Versions of every global environment come from this one sequence, so no
+# two environments ever share one.
+VERSIONS = count()
 
+
+# Locals live in slots numbered by the resolver in declaration order, only
+# globals are still looked up by name.
 class Environment:
+    __slots__ = ("values", "enclosing")
+
+    def __init__(self, enclosing=None, values: list[object] | None = None):
+        self.values: list[object] = [] if values is None else values
+        self.enclosing: Environment | GlobalEnvironment | None = enclosing
+
+    def define(self, name: str, value: object):
+        self.values.append(value)
+
+    def ancestor(self, distance: int) -> 'Environment':
+        environment: Environment = self
+        for _ in range(distance):
+            environment = environment.enclosing
+        return environment
+
+    def get_at(self, distance: int, slot: int):
+        return self.ancestor(distance).values[slot]
 
-    def __init__(self, enclosing=None):
-        self.values = {}
-        self.enclosing: Environment | None = enclosing
+    def assign_at(self, distance: int, slot: int, value: object):
+        self.ancestor(distance).values[slot] = value
+
+
+# Any change to the globals gives them a new version. A value read at some
+# version can be used again for as long as the version stays the same.
+class GlobalEnvironment:
+    def __init__(self):
+        self.values: dict[str, object] = {}
+        self.version = next(VERSIONS)
 
     def define(self, name: str, value: object):
         self.values[name] = value
+        self.version = next(VERSIONS)
+
+    def changed(self):
+        # For code that writes to values directly.
+        self.version = next(VERSIONS)
 
     def get(self, name: Token):
         if name.lexeme in self.values:
             return self.values[name.lexeme]
 
-        if self.enclosing is not None:
-            return self.enclosing.get(name)
-
         raise LoxRuntimeError(name, f"Undefined variable '{name.lexeme}'.")
 
     def assign(self, name: Token, value: object):
         if name.lexeme in self.values:
             self.values[name.lexeme] = value
-            return
-
-        if self.enclosing is not None:
-            self.enclosing.assign(name, value)
+            self.version = next(VERSIONS)
             return
 
         raise LoxRuntimeError(name, f"Undefined variable '{name.lexeme}'.")
@@ -1,3 +1,6 @@
+import sys
+from io import TextIOBase
+from lox.output import Output
 from lox.token import Token
 
 
@@ -6,3 +9,41 @@ class LoxRuntimeError(Exception):
         self.token: Token = token
         self.message = message
         super().__init__(message)
+
+
+# Raised by natives, which do not know where they were called from. The call
+# site reports it as a LoxRuntimeError at the line of the call.
+class NativeError(Exception):
+    def __init__(self, message: str):
+        self.message = message
+        super().__init__(message)
+
+
+# Prints errors as they are found and remembers which kinds there were, so
+# the command can exit with the matching status once it is done. Each Lox
+# session has its own, shared by every pass that runs its code.
+class ErrorReporter:
+
+    def __init__(self, stream: TextIOBase | None = None, output: Output | None = None):
+        # Where errors are printed; sys.stderr when None.
+        self.stream = stream
+        # Flushed before each error, so that lines printed before it come
+        # out before it.
+        self.output = output
+        self.has_error = False
+        self.has_runtime_error = False
+
+    def error(self, line: int, message: str):
+        self.report(line, "", message)
+
+    def runtime_error(self, error: LoxRuntimeError):
+        if self.output is not None:
+            self.output.flush()
+        print(error.message + f"\n[line {error.token.line}]", file=self.stream or sys.stderr)
+        self.has_runtime_error = True
+
+    def report(self, line: int, where: str, message: str):
+        if self.output is not None:
+            self.output.flush()
+        print(f"[line {line}] Error{where}: {message}", file=self.stream or sys.stderr)
+        self.has_error = True
@@ -2,6 +2,7 @@ from lox.token import Token
 
 
 class Expr:
+    __slots__ = ()
 
     class Visitor:
         def visit_expr_assign(self, expr: 'Assign'):
@@ -31,34 +32,61 @@ class Expr:
     def accept(self, visitor: Visitor):
         pass
 
+    def key(self) -> tuple:
+        pass
+
+    def __eq__(self, other):
+        return type(other) is type(self) and self.key() == other.key()
+
+    def __hash__(self):
+        return hash(self.key())
+
 
 class Assign(Expr):
+    __slots__ = ("name", "value", "depth", "slot")
+
     name: Token
     value: Expr
+    depth: int | None
+    slot: int | None
 
     def __init__(self, name, value):
         self.name = name
         self.value = value
+        self.depth = None
+        self.slot = None
 
     def accept(self, visitor: Expr.Visitor):
         return visitor.visit_expr_assign(self)
 
+    def key(self) -> tuple:
+        return (Assign, self.name.key(), self.value.key())
+
 
 class Binary(Expr):
+    __slots__ = ("left", "operator", "right", "operation")
+
     left: Expr
     operator: Token
     right: Expr
+    operation: object
 
     def __init__(self, left, operator, right):
         self.left = left
         self.operator = operator
         self.right = right
+        self.operation = None
 
     def accept(self, visitor: Expr.Visitor):
         return visitor.visit_expr_binary(self)
 
+    def key(self) -> tuple:
+        return (Binary, self.left.key(), self.operator.key(), self.right.key())
+
 
 class Grouping(Expr):
+    __slots__ = ("expression",)
+
     expression: Expr
 
     def __init__(self, expression):
@@ -67,22 +95,34 @@ class Grouping(Expr):
     def accept(self, visitor: Expr.Visitor):
         return visitor.visit_expr_grouping(self)
 
+    def key(self) -> tuple:
+        return (Grouping, self.expression.key())
+
 
 class Call(Expr):
+    __slots__ = ("callee", "paren", "arguments", "checked")
+
     callee: Expr
     paren: Token
     arguments: list[Expr]
+    checked: object
 
     def __init__(self, callee, paren, arguments):
         self.callee = callee
         self.paren = paren
         self.arguments = arguments
+        self.checked = None
 
     def accept(self, visitor: Expr.Visitor):
         return visitor.visit_expr_call(self)
 
+    def key(self) -> tuple:
+        return (Call, self.callee.key(), self.paren.key(), tuple(item.key() for item in self.arguments))
+
 
 class Literal(Expr):
+    __slots__ = ("value",)
+
     value: object
 
     def __init__(self, value):
@@ -91,8 +131,13 @@ class Literal(Expr):
     def accept(self, visitor: Expr.Visitor):
         return visitor.visit_expr_literal(self)
 
+    def key(self) -> tuple:
+        return (Literal, (type(self.value), repr(self.value)))
+
 
 class Logical(Expr):
+    __slots__ = ("left", "operator", "right")
+
     left: Expr
     operator: Token
     right: Expr
@@ -105,8 +150,13 @@ class Logical(Expr):
     def accept(self, visitor: Expr.Visitor):
         return visitor.visit_expr_logical(self)
 
+    def key(self) -> tuple:
+        return (Logical, self.left.key(), self.operator.key(), self.right.key())
+
 
 class Unary(Expr):
+    __slots__ = ("operator", "right")
+
     operator: Token
     right: Expr
 
@@ -117,12 +167,26 @@ class Unary(Expr):
     def accept(self, visitor: Expr.Visitor):
         return visitor.visit_expr_unary(self)
 
+    def key(self) -> tuple:
+        return (Unary, self.operator.key(), self.right.key())
+
 
 class Variable(Expr):
+    __slots__ = ("name", "depth", "slot", "cache")
+
     name: Token
+    depth: int | None
+    slot: int | None
+    cache: tuple | None
 
     def __init__(self, name):
         self.name = name
+        self.depth = None
+        self.slot = None
+        self.cache = None
 
     def accept(self, visitor: Expr.Visitor):
         return visitor.visit_expr_variable(self)
+
+    def key(self) -> tuple:
+        return (Variable, self.name.key())
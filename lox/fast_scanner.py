@@ -0,0 +1,132 @@
+import re
+from sys import intern
+from collections.abc import Generator, Iterable, Iterator
+from lox.error import ErrorReporter
+from lox.scanner import Scanner
+from lox.token import Token, TokenType
+
+# Each match is one lexeme, after any spaces in front of it, which are
+# skipped in the same step and never given back to the alternatives. These
+# are tried in order, and the last one catches any character no other
+# alternative accepts. Trailing spaces match nothing and are simply skipped.
+TOKEN_PATTERN = re.compile(r"""
+    [ \t\r]*+
+    (?:
+        ([A-Za-z_][A-Za-z0-9_]*)
+      | ([!=<>]=?|[(){},.\-+;*]|/(?!/))
+      | (\n)
+      | ([0-9]+(?:\.[0-9]+)?)
+      | ("[^"]*")
+      | (//[^\n]*)
+      | ("[^"]*)
+      | (.)
+    )
+""", re.VERBOSE | re.DOTALL)
+IDENTIFIER, OPERATOR, NEWLINE, NUMBER, STRING, COMMENT, UNTERMINATED, ERROR = range(1, 9)
+
+OPERATORS = {
+    "(": TokenType.LEFT_PAREN,
+    ")": TokenType.RIGHT_PAREN,
+    "{": TokenType.LEFT_BRACE,
+    "}": TokenType.RIGHT_BRACE,
+    ",": TokenType.COMMA,
+    ".": TokenType.DOT,
+    "-": TokenType.MINUS,
+    "+": TokenType.PLUS,
+    ";": TokenType.SEMICOLON,
+    "/": TokenType.SLASH,
+    "*": TokenType.STAR,
+    "!": TokenType.BANG,
+    "!=": TokenType.BANG_EQUAL,
+    "=": TokenType.EQUAL,
+    "==": TokenType.EQUAL_EQUAL,
+    ">": TokenType.GREATER,
+    ">=": TokenType.GREATER_EQUAL,
+    "<": TokenType.LESS,
+    "<=": TokenType.LESS_EQUAL,
+}
+
+
+# Produces the same tokens and errors as Scanner, but lets the regex engine
+# find each lexeme instead of stepping through the source in Python. The
+# character classes above only match what Scanner accepts for ASCII text;
+# text with other characters goes through Scanner itself, whose str methods
+# also accept non-ASCII letters and digits.
+class FastScanner(Scanner):
+
+    def __init__(self, source: str = "", reporter: ErrorReporter | None = None):
+        super().__init__(source, reporter)
+
+    def scan_tokens(self) -> list[Token]:
+        self.tokens.extend(self.stream((self.source,)))
+        self.current = len(self.source)
+        return self.tokens
+
+    # Scans text arriving in pieces, such as the lines of an open file, and
+    # yields each token as soon as it is complete. Only the unfinished last
+    # line, or a string still open across lines, is held back.
+    def stream(self, chunks: Iterable[str]) -> Iterator[Token]:
+        pending = ""
+        in_string = False
+        for chunk in chunks:
+            pending += chunk
+            if in_string and '"' not in chunk:
+                continue
+            end = pending.rfind("\n") + 1
+            if end:
+                rest = yield from self.scan(pending[:end], False)
+                in_string = rest < end
+                pending = pending[rest:]
+
+        yield from self.scan(pending, True)
+        yield Token(TokenType.EOF, "", None, self.line)
+
+    # Yields the tokens of text that starts at a token boundary. Unless this
+    # is the final piece, a string left open at the end is not scanned;
+    # returns where it starts so it can be rescanned with the next piece.
+    def scan(self, text: str, final: bool) -> Generator[Token, None, int]:
+        if not text.isascii():
+            rest = len(text)
+            if not final:
+                for match in TOKEN_PATTERN.finditer(text):
+                    if match.lastindex == UNTERMINATED:
+                        rest = match.start(UNTERMINATED)
+            scanner = Scanner(text[:rest], self.reporter)
+            scanner.line = self.line
+            yield from scanner.scan_tokens()[:-1]
+            self.line = scanner.line
+            return rest
+
+        keywords = self.keywords
+        identifier = TokenType.IDENTIFIER
+        line = self.line
+
+        for match in TOKEN_PATTERN.finditer(text):
+            kind = match.lastindex
+            value = match[kind]
+            if kind == IDENTIFIER:
+                yield Token(keywords.get(value, identifier), intern(value), None, line)
+            elif kind == OPERATOR:
+                yield Token(OPERATORS[value], value, None, line)
+            elif kind == NEWLINE:
+                line += 1
+            elif kind == NUMBER:
+                yield Token(TokenType.NUMBER, value, float(value), line)
+            elif kind == STRING:
+                line += value.count("\n")
+                yield Token(TokenType.STRING, value, value[1:-1], line)
+            elif kind == COMMENT:
+                pass
+            elif kind == UNTERMINATED:
+                if not final:
+                    self.line = line
+                    return match.start(UNTERMINATED)
+                self.line = line + value.count("\n")
+                self.error("Unterminated string.")
+                line = self.line
+            else:
+                self.line = line
+                self.error(f"Unexpected character: {value}")
+
+        self.line = line
+        return len(text)
@@ -1,61 +1,101 @@
-import time
+from operator import add, sub, mul, truediv, gt, ge, lt, le, eq, ne
 from lox.expr import Expr, Literal, Grouping, Unary, Binary, Variable, Assign, Logical, Call
 from lox.token import TokenType, Token
-from lox.error import LoxRuntimeError
-from lox.stmt import Stmt, If, While, Function
-from lox.environment import Environment
+from lox.error import LoxRuntimeError, NativeError, ErrorReporter
+from lox.stmt import Stmt, If, While, Function, Return
+from lox.environment import Environment, GlobalEnvironment
 from lox.lox_callable import LoxCallable
-from lox.return_error import ReturnError
-
-
+from lox.lox_function import LoxFunction, TailCall
+from lox.output import Output, BufferedOutput
+from lox.natives import define_natives
+from lox.lox_list import LoxList
+
+# Text of the integral numbers printed most often. Zero is left out, since
+# 0.0 and -0.0 are equal keys but print differently.
+SMALL_NUMBERS = {float(n): str(n) for n in range(-1024, 1025) if n}
+
+# What each binary operator does to two numbers. Equality needs no more than
+# this for any operands.
+OPERATIONS = {
+    TokenType.PLUS: add,
+    TokenType.MINUS: sub,
+    TokenType.STAR: mul,
+    TokenType.SLASH: truediv,
+    TokenType.GREATER: gt,
+    TokenType.GREATER_EQUAL: ge,
+    TokenType.LESS: lt,
+    TokenType.LESS_EQUAL: le,
+    TokenType.EQUAL_EQUAL: eq,
+    TokenType.BANG_EQUAL: ne,
+}
+
+
+# Statements return None to fall through to the next statement, or a
+# one-element tuple holding the value of a `return`, which every enclosing
+# statement hands back up to LoxFunction.call. A `return` of a call hands back
+# a TailCall instead, which LoxFunction.call runs in its own loop. The other
+# engines have no such loop, and nest every call.
 class Interpreter(Expr.Visitor, Stmt.Visitor):
-    lox_globals = Environment()
-    environment = lox_globals
-
-    def __init__(self):
-        class Clock(LoxCallable):
-            def arity(self):
-                return 0
-
-            def call(self, interpreter, arguments):
-                return time.time()
-
-            def __str__(self):
-                return "<native fn>"
 
-        self.lox_globals.define("clock", Clock())
+    def __init__(self, reporter: ErrorReporter | None = None,
+                 output: Output | None = None):
+        self.reporter = reporter or ErrorReporter()
+        # Flushing is left to whoever passes the output in. Without one,
+        # each line is written out as it is printed.
+        self.output = output or BufferedOutput(flush_every=1)
+        self.lox_globals = GlobalEnvironment()
+        self.environment: Environment = self.lox_globals
+        define_natives(self.lox_globals)
 
     def interpret(self, statements: list[Stmt]):
         try:
             for statement in statements:
                 self.execute(statement)
         except LoxRuntimeError as error:
-            from lox.lox import Lox
-            Lox.runtime_error(error)
+            self.reporter.runtime_error(error)
 
     def execute(self, statement: Stmt):
-        statement.accept(self)
+        return statement.accept(self)
 
     def visit_stmt_expression(self, stmt):
         self.expression(stmt.expression)
         return None
 
     def visit_stmt_while(self, stmt: While):
+        if stmt.reuse:
+            # Each iteration starts the body's environment over empty. A for
+            # loop's increment runs after the body, outside it.
+            body, increment = stmt.body, None
+            if body.bare:
+                body, increment = body.statements
+            environment = Environment(self.environment)
+            values = environment.values
+            statements = body.statements
+            while (self.is_truthy(self.expression(stmt.condition))):
+                values.clear()
+                completion = self.execute_block(statements, environment)
+                if completion is not None:
+                    return completion
+                if increment is not None:
+                    self.execute(increment)
+            return None
 
         while (self.is_truthy(self.expression(stmt.condition))):
-            self.execute(stmt.body)
+            completion = self.execute(stmt.body)
+            if completion is not None:
+                return completion
         return None
 
     def visit_stmt_if(self, stmt: If):
         if (self.is_truthy(self.expression(stmt.condition))):
-            self.execute(stmt.then_branch)
+            return self.execute(stmt.then_branch)
         elif (stmt.else_branch is not None):
-            self.execute(stmt.else_branch)
+            return self.execute(stmt.else_branch)
         return None
 
     def visit_stmt_print(self, stmt):
         value = self.expression(stmt.expression)
-        print(self.stringify(value))
+        self.output.print(self.stringify(value))
         return None
 
     def visit_stmt_var(self, stmt):
@@ -69,7 +109,6 @@ class Interpreter(Expr.Visitor, Stmt.Visitor):
         return None
 
     def visit_stmt_function(self, stmt: Function):
-        from lox.lox_function import LoxFunction
         function: LoxFunction = LoxFunction(stmt, self.environment)
         self.environment.define(stmt.name.lexeme, function)
         return None
@@ -81,31 +120,70 @@ class Interpreter(Expr.Visitor, Stmt.Visitor):
         for argument in expr.arguments:
             arguments.append(self.expression(argument))
 
+        function: LoxCallable = self.check_call(expr, callee, arguments)
+        try:
+            return function.call(self, arguments)
+        except RecursionError:
+            raise LoxRuntimeError(expr.paren, "Stack overflow.") from None
+        except NativeError as error:
+            raise LoxRuntimeError(expr.paren, error.message) from None
+
+    def check_call(self, expr: Call, callee: object, arguments: list[object]) -> LoxCallable:
+        # A call site always passes the same number of arguments, so a
+        # callee that passed here once always will.
+        if callee is expr.checked:
+            return callee
+
         if not isinstance(callee, LoxCallable):
             raise LoxRuntimeError(
                 expr.paren, "Can only call functions and classes.")
 
-        function: LoxCallable = callee
-
-        if len(arguments) != function.arity():
+        if len(arguments) != callee.arity():
             raise LoxRuntimeError(
-                expr.paren, f"Expected {function.arity()} arguments but got {len(arguments)}.")
-        return function.call(self, arguments)
+                expr.paren, f"Expected {callee.arity()} arguments but got {len(arguments)}.")
+        expr.checked = callee
+        return callee
 
-    def visit_stmt_return(self, stmt):
+    def visit_stmt_return(self, stmt: Return):
         val: object = None
 
+        if isinstance(stmt.value, Call):
+            # Evaluate the callee and arguments here, but leave the call
+            # itself to the caller once this function's frames are gone.
+            callee: object = self.expression(stmt.value.callee)
+            arguments: list[object] = []
+
+            for argument in stmt.value.arguments:
+                arguments.append(self.expression(argument))
+
+            return TailCall(callee, arguments, stmt.value)
+
         if stmt.value is not None:
             val = self.expression(stmt.value)
 
-        raise ReturnError(val)
+        return (val,)
 
     def visit_expr_variable(self, expr: Variable):
-        return self.environment.get(expr.name)
+        if expr.depth is not None:
+            return self.environment.get_at(expr.depth, expr.slot)
+
+        # The version and value are cached together, and versions are never
+        # reused, so a node shared by several interpreters is still safe.
+        lox_globals = self.lox_globals
+        cache = expr.cache
+        if cache is not None and cache[0] == lox_globals.version:
+            return cache[1]
+        value = lox_globals.get(expr.name)
+        expr.cache = (lox_globals.version, value)
+        return value
 
     def visit_expr_assign(self, expr: Assign):
         value: object = self.expression(expr.value)
-        self.environment.assign(expr.name, value)
+
+        if expr.depth is not None:
+            self.environment.assign_at(expr.depth, expr.slot, value)
+        else:
+            self.lox_globals.assign(expr.name, value)
         return value
 
     def visit_expr_literal(self, expr: Literal):
@@ -123,8 +201,13 @@ class Interpreter(Expr.Visitor, Stmt.Visitor):
         return self.expression(expr.right)
 
     def visit_stmt_block(self, stmt):
-        self.execute_block(stmt.statements, Environment(self.environment))
-        return None
+        if stmt.bare:
+            for statement in stmt.statements:
+                completion = self.execute(statement)
+                if completion is not None:
+                    return completion
+            return None
+        return self.execute_block(stmt.statements, Environment(self.environment))
 
     def execute_block(self, statements: list[Stmt], environment: Environment):
         previous: Environment = self.environment
@@ -133,7 +216,10 @@ class Interpreter(Expr.Visitor, Stmt.Visitor):
             self.environment = environment
 
             for statement in statements:
-                self.execute(statement)
+                completion = self.execute(statement)
+                if completion is not None:
+                    return completion
+            return None
         finally:
             self.environment = previous
 
@@ -155,41 +241,24 @@ class Interpreter(Expr.Visitor, Stmt.Visitor):
         left = self.expression(expr.left)
         right = self.expression(expr.right)
 
-        if expr.operator.token_type == TokenType.MINUS:
-            self.check_number_operands(expr.operator, left, right)
-            return float(left) - float(right)
-        elif expr.operator.token_type == TokenType.PLUS:
-            if isinstance(left, float) and isinstance(right, float):
-                return float(left) + float(right)
+        # Each node looks its operation up once, the first time it runs.
+        operation = expr.operation
+        if operation is None:
+            operation = expr.operation = OPERATIONS[expr.operator.token_type]
+        if type(left) is float and type(right) is float:
+            return operation(left, right)
+        return self.binary_operands(expr, operation, left, right)
+
+    def binary_operands(self, expr: Binary, operation, left, right):
+        token_type = expr.operator.token_type
+        if token_type == TokenType.EQUAL_EQUAL or token_type == TokenType.BANG_EQUAL:
+            return operation(left, right)
+        if token_type == TokenType.PLUS:
             if isinstance(left, str) and isinstance(right, str):
-                return str(left) + str(right)
+                return left + right
             raise LoxRuntimeError(expr.operator,
                                   f"Operands must be two numbers or two strings.")
-
-        elif expr.operator.token_type == TokenType.SLASH:
-            self.check_number_operands(expr.operator, left, right)
-            return float(left) / float(right)
-        elif expr.operator.token_type == TokenType.STAR:
-            self.check_number_operands(expr.operator, left, right)
-            return float(left) * float(right)
-        elif expr.operator.token_type == TokenType.GREATER:
-            self.check_number_operands(expr.operator, left, right)
-            return float(left) > float(right)
-        elif expr.operator.token_type == TokenType.GREATER_EQUAL:
-            self.check_number_operands(expr.operator, left, right)
-            return float(left) >= float(right)
-        elif expr.operator.token_type == TokenType.LESS:
-            self.check_number_operands(expr.operator, left, right)
-            return float(left) < float(right)
-        elif expr.operator.token_type == TokenType.LESS_EQUAL:
-            self.check_number_operands(expr.operator, left, right)
-            return float(left) <= float(right)
-        elif expr.operator.token_type == TokenType.BANG_EQUAL:
-            return not self.is_equal(left, right)
-        elif expr.operator.token_type == TokenType.EQUAL_EQUAL:
-            return self.is_equal(left, right)
-
-        return None
+        raise LoxRuntimeError(expr.operator, f"Operands must be numbers.")
 
     def expression(self, expr: Expr):
         return expr.accept(self)
@@ -201,35 +270,62 @@ class Interpreter(Expr.Visitor, Stmt.Visitor):
             return value
         return True
 
-    def is_equal(self, a, b):
-        if a is None and b is None:
-            return True
-        if a is None:
-            return False
-        return a == b
-
     def check_number_operand(self, operator: Token, operand):
         if isinstance(operand, float):
             return
         raise LoxRuntimeError(operator,
                               f"Operand must be a number.")
 
-    def check_number_operands(self, operator: Token, left, right):
-        if isinstance(left, float) and isinstance(right, float):
-            return
-        raise LoxRuntimeError(operator,
-                              f"Operands must be numbers.")
-
     def stringify(self, value):
+        if type(value) is float:
+            text = SMALL_NUMBERS.get(value)
+            if text is not None:
+                return text
+            # Below 1e16, str() writes an integral number out in full, and
+            # the int has the same digits. Zero keeps its sign only as text.
+            if value.is_integer() and value and -1e16 < value < 1e16:
+                return str(int(value))
+            text = str(value)
+            if text.endswith(".0"):
+                text = text[:-2]
+            return text
         if value is None:
             return "nil"
         if value is True:
             return "true"
         if value is False:
             return "false"
-        if isinstance(value, float):
-            text = str(value)
-            if text.endswith(".0"):
-                text = text[:-2]
-            return text
+        if type(value) is LoxList:
+            return self.stringify_list(value)
         return str(value)
+
+    def stringify_list(self, value: LoxList) -> str:
+        # Walks the lists with a stack of their item iterators rather than by
+        # recursion, so that lists nested any depth print. A list that holds
+        # itself, at any depth, prints as [...] there.
+        text = ["["]
+        printing = {id(value)}
+        stack = [(value, iter(value.items))]
+        first = True
+        while stack:
+            current, items = stack[-1]
+            for item in items:
+                if not first:
+                    text.append(", ")
+                first = False
+                if type(item) is not LoxList:
+                    text.append(self.stringify(item))
+                elif id(item) in printing:
+                    text.append("[...]")
+                else:
+                    printing.add(id(item))
+                    stack.append((item, iter(item.items)))
+                    text.append("[")
+                    first = True
+                    break
+            else:
+                stack.pop()
+                printing.discard(id(current))
+                text.append("]")
+                first = False
+        return "".join(text)
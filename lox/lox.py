@@ -1,110 +1,215 @@
-from lox.scanner import Scanner
-from lox.parser import Parser
-from lox.expr import Expr
-from lox.ast_printer import AstPrinter
-from lox.error import LoxRuntimeError
-from lox.interpreter import Interpreter
-from lox.stmt import Stmt
+from __future__ import annotations
+import gc
+import sys
+from collections.abc import Iterable
+from functools import cached_property
+from io import TextIOBase
+from lox.error import ErrorReporter, LoxRuntimeError
+from lox.fast_scanner import FastScanner
+from lox.output import Output, BufferedOutput
+from lox.token import Token
+
+# Everything else is imported by the commands and engines that use it, so
+# that starting up only loads what a command needs.
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from lox.ast_cache import AstCache
+    from lox.interpreter import Interpreter
+    from lox.stmt import Stmt
+
+
+# Imports everything any command may need, for processes that start up once
+# and then run many commands, or fork workers that do.
+def preload():
+    import lox.ast_cache
+    import lox.ast_printer
+    import lox.closure_compiler
+    import lox.interpreter
+    import lox.optimizer
+    import lox.parser
+    import lox.resolver
+    import lox.transpiler
+    import lox.vm
+    lox.ast_cache.interpreter_version()
 
 
 class Lox:
-    hasError: bool = False
-    has_runtime_error: bool = False
-    interpreter = Interpreter()
+    engines = ("tree", "closure", "vm", "python")
 
-    def __init__(self):
-        pass
+    def __init__(self, max_frames: int | None = None, stream: bool = False,
+                 cache: bool = True, output: Output | None = None,
+                 errors: TextIOBase | None = None, freeze: bool = False):
+        # Call depth of the vm engine, FRAMES_MAX in lox.vm when not given.
+        # Only the vm engine keeps its own frames, so only it has this limit.
+        self.max_frames = max_frames
+        # Scan files as they are read instead of loading them whole. Scan
+        # and parse errors then come out in source order rather than all
+        # scan errors first.
+        self.stream = stream
+        # Reuse the statements of files run before, see AstCache. Streamed
+        # files are never cached, since they are never held whole.
+        self.cache = cache
+        # Freeze everything alive once a cached script's statements are
+        # ready, so that collections while it runs never walk its tree. Frozen
+        # objects are never collected, so this is only for a process that
+        # runs one script and exits.
+        self.freeze = freeze
+        # Everything a session changes is held here rather than in classes,
+        # so that sessions in one process, on one thread or many, never see
+        # each other's globals or errors. Printed lines go to sys.stdout in
+        # blocks, or line by line on a terminal, and errors go to
+        # sys.stderr, unless told otherwise.
+        self.output = output or BufferedOutput()
+        self.reporter = ErrorReporter(errors, self.output)
+
+    @cached_property
+    def interpreter(self) -> Interpreter:
+        from lox.interpreter import Interpreter
+        return Interpreter(self.reporter, self.output)
 
     def get_file_contents(self, filename):
         with open(filename) as file:
             return file.read()
 
-    def run_cmd(self, command, filename):
+    def run_cmd(self, command, filename, engine="tree"):
         if command == 'tokenize':
-            code = self.get_file_contents(filename)
-            scanner = Scanner(code)
-            tokens = scanner.scan_tokens()
-            for token in tokens:
-                print(token)
-            if self.hasError:
+            if self.stream:
+                with open(filename) as file:
+                    for token in FastScanner(reporter=self.reporter).stream(file):
+                        self.output.print(str(token))
+            else:
+                code = self.get_file_contents(filename)
+                scanner = FastScanner(code, self.reporter)
+                tokens = scanner.scan_tokens()
+                for token in tokens:
+                    self.output.print(str(token))
+            self.output.flush()
+            if self.reporter.has_error:
                 exit(65)
 
         elif command == 'parse':
+            from lox.ast_printer import AstPrinter
+            from lox.parser import Parser
+
             code = self.get_file_contents(filename)
-            scanner = Scanner(code)
+            scanner = FastScanner(code, self.reporter)
             tokens = scanner.scan_tokens()
-            if self.hasError:
+            if self.reporter.has_error:
                 exit(65)
-            parser = Parser(tokens)
+            parser = Parser(tokens, self.reporter)
             try:
-                expr: Expr = parser.expression()
+                expr = parser.expression()
             except:
                 pass
-            if self.hasError:
+            if self.reporter.has_error:
                 exit(65)
             printer = AstPrinter()
-            print(printer.print(expr))
+            self.output.print(str(printer.print(expr)))
+            self.output.flush()
 
         elif command == 'evaluate':
+            from lox.parser import Parser
+
             code = self.get_file_contents(filename)
-            scanner = Scanner(code)
+            scanner = FastScanner(code, self.reporter)
             tokens = scanner.scan_tokens()
-            parser = Parser(tokens)
-            expr: Expr = parser.expression()
+            parser = Parser(tokens, self.reporter)
+            expr = parser.expression()
             try:
                 value = self.interpreter.expression(expr)
-                print(self.interpreter.stringify(value))
+                self.output.print(self.interpreter.stringify(value))
+                self.output.flush()
             except LoxRuntimeError as error:
-                from lox.lox import Lox
-                Lox.runtime_error(error)
-            if self.hasError:
+                self.reporter.runtime_error(error)
+            if self.reporter.has_error:
                 exit(65)
-            if self.has_runtime_error:
+            if self.reporter.has_runtime_error:
                 exit(70)
         elif command == 'run':
-            self.run_file(filename)
+            self.run_file(filename, engine)
         else:
-            import sys
             print(f"Unknown command: {command}", file=sys.stderr)
             exit(1)
 
-    def run_file(self, filename):
+    def run_file(self, filename, engine="tree"):
         with open(filename) as file:
-            file_contents = file.read()
-            self.run(file_contents)
-            if self.hasError:
+            if self.stream:
+                self.run_tokens(FastScanner(reporter=self.reporter).stream(file), engine)
+            elif self.cache:
+                from lox.ast_cache import AstCache
+                self.run_cached(file.read(), AstCache(filename), engine)
+            else:
+                self.run(file.read(), engine)
+            if self.reporter.has_error:
                 exit(65)
-            if self.has_runtime_error:
+            if self.reporter.has_runtime_error:
                 exit(70)
 
-    def run_prompt(self):
+    def run_prompt(self, engine="tree"):
         while True:
             print("> ", end="")
             line = input()
             if not line:
                 break
-            self.run(line)
-            self.hasError = False
-
-    def run(self, code: str):
-        scanner = Scanner(code)
-        tokens = scanner.scan_tokens()
-        parser = Parser(tokens)
-        statements: Stmt = parser.parse()
-        self.interpreter.interpret(statements)
-
-    @classmethod
-    def error(cls, line: int, message: str):
-        cls.report(line, "", message)
-
-    @classmethod
-    def runtime_error(cls, error: LoxRuntimeError):
-        import sys
-        print(error.message + f"\n[line {error.token.line}]", file=sys.stderr)
-        cls.has_runtime_error = True
-
-    @classmethod
-    def report(cls, line: int, where: str, message: str):
-        import sys
-        print(f"[line {line}] Error{where}: {message}", file=sys.stderr)
-        cls.hasError = True
+            self.run(line, engine)
+            self.reporter.has_error = False
+
+    def run(self, code: str, engine: str = "tree"):
+        scanner = FastScanner(code, self.reporter)
+        self.run_tokens(scanner.scan_tokens(), engine)
+
+    def run_cached(self, code: str, cache: AstCache, engine: str = "tree"):
+        statements = cache.load(code)
+        if statements is None:
+            statements = self.prepare(FastScanner(code, self.reporter).scan_tokens())
+            if statements is None:
+                return
+            cache.store(code, statements)
+        if self.freeze:
+            gc.freeze()
+        self.execute(statements, engine)
+
+    def run_tokens(self, tokens: Iterable[Token], engine: str = "tree"):
+        statements = self.prepare(tokens)
+        if statements is not None:
+            self.execute(statements, engine)
+
+    def prepare(self, tokens: Iterable[Token]) -> list[Stmt] | None:
+        from lox.optimizer import Optimizer
+        from lox.parser import Parser
+        from lox.resolver import Resolver
+
+        parser = Parser(tokens, self.reporter)
+        statements: list[Stmt] = parser.parse()
+
+        if self.reporter.has_error:
+            return None
+
+        resolver = Resolver(self.reporter)
+        resolver.resolve(statements)
+
+        if self.reporter.has_error:
+            return None
+
+        return Optimizer().optimize(statements)
+
+    def execute(self, statements: list[Stmt], engine: str = "tree"):
+        try:
+            if engine == "closure":
+                from lox.closure_compiler import ClosureCompiler
+                ClosureCompiler(self.interpreter).interpret(statements)
+            elif engine == "vm":
+                from lox.vm import VM, FRAMES_MAX
+                VM(self.interpreter, self.max_frames or FRAMES_MAX).interpret(statements)
+            elif engine == "python":
+                from lox.transpiler import PythonBackend
+                PythonBackend(self.interpreter).interpret(statements)
+            else:
+                self.interpreter.interpret(statements)
+                return
+            # The other engines write globals straight into their dict. The
+            # tree-walker keeps what it read from them until their version
+            # changes, so they need a new one.
+            self.interpreter.lox_globals.changed()
+        finally:
+            self.output.flush()
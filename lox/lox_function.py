@@ -1,7 +1,8 @@
 from lox.lox_callable import LoxCallable
+from lox.error import LoxRuntimeError, NativeError
+from lox.expr import Call
 from lox.stmt import Function
 from lox.environment import Environment
-from lox.return_error import ReturnError
 
 
 class LoxFunction(LoxCallable):
@@ -13,21 +14,43 @@ class LoxFunction(LoxCallable):
         self.closuer = closuer
 
     def call(self, interpreter, arguments):
-
-        environment: Environment = Environment(self.closuer)
-
-        for param, argument in zip(self.declaration.params, arguments):
-            environment.define(param.lexeme, argument)
-
-        try:
-            interpreter.execute_block(self.declaration.body, environment)
-        except ReturnError as return_val:
-            return return_val.value
-
-        return None
+        function: LoxFunction = self
+
+        # Calls in tail position come back as a TailCall and run in this
+        # loop, so tail recursion does not grow the Python stack.
+        while True:
+            # Parameters take the first slots of the function's scope.
+            environment: Environment = Environment(
+                function.closuer, arguments)
+
+            completion = interpreter.execute_block(
+                function.declaration.body, environment)
+            if completion is None:
+                return None
+            if type(completion) is not TailCall:
+                return completion[0]
+
+            callee: LoxCallable = interpreter.check_call(
+                completion.call, completion.callee, completion.arguments)
+            arguments = completion.arguments
+            if type(callee) is not LoxFunction:
+                try:
+                    return callee.call(interpreter, arguments)
+                except NativeError as error:
+                    raise LoxRuntimeError(completion.call.paren, error.message) from None
+            function = callee
 
     def arity(self):
         return len(self.declaration.params)
 
     def __str__(self):
         return f"<fn {self.declaration.name.lexeme}>"
+
+
+class TailCall:
+    __slots__ = ("callee", "arguments", "call")
+
+    def __init__(self, callee: object, arguments: list[object], call: Call):
+        self.callee = callee
+        self.arguments = arguments
+        self.call = call
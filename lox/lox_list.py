@@ -0,0 +1,8 @@
+# A Lox list wraps a Python list, not subclasses it, so that lists compare
+# by identity like every other Lox object and are always truthy, empty or
+# not.
+class LoxList:
+    __slots__ = ("items",)
+
+    def __init__(self, items: list[object] | None = None):
+        self.items: list[object] = [] if items is None else items
@@ -0,0 +1,361 @@
+import math
+import time
+from decimal import Decimal, Context, ROUND_HALF_UP
+from lox.error import NativeError
+from lox.lox_callable import LoxCallable
+from lox.lox_list import LoxList
+
+
+class NativeFunction(LoxCallable):
+    __slots__ = ("name", "function", "parameters", "with_interpreter")
+
+    def __init__(self, name: str, function, with_interpreter: bool = False):
+        self.name = name
+        self.function = function
+        self.parameters = function.__code__.co_argcount - with_interpreter
+        self.with_interpreter = with_interpreter
+
+    def call(self, interpreter, arguments):
+        if self.with_interpreter:
+            return self.function(interpreter, *arguments)
+        return self.function(*arguments)
+
+    def arity(self):
+        return self.parameters
+
+    def __str__(self):
+        return "<native fn>"
+
+
+# Longest string repeat builds, well short of what Python could index or
+# allocate.
+MAX_REPEAT_LENGTH = 1 << 30
+
+# Most digits fixed writes after the point, as in JavaScript's toFixed. The
+# context has room for those and the 309 digits before the point of the
+# largest number.
+MAX_FIXED_DIGITS = 100
+FIXED_CONTEXT = Context(prec=309 + MAX_FIXED_DIGITS)
+
+
+# Natives by module. Every module is defined in the globals of each new
+# interpreter, so one registered before the interpreter is made is there for
+# its scripts too.
+MODULES: dict[str, dict[str, NativeFunction]] = {}
+
+
+def native(module: str, name: str | None = None, with_interpreter: bool = False):
+    # Registers a Python function of Lox values under the given name, or its
+    # own. Natives report bad arguments by raising NativeError, which the
+    # call site reports at the line of the call.
+    def register(function):
+        lox_name = name or function.__name__
+        MODULES.setdefault(module, {})[lox_name] = NativeFunction(
+            lox_name, function, with_interpreter)
+        return function
+    return register
+
+
+def define_natives(lox_globals, modules: list[str] | None = None):
+    for module in MODULES if modules is None else modules:
+        for name, function in MODULES[module].items():
+            lox_globals.define(name, function)
+
+
+def check_number(value) -> float:
+    if type(value) is not float:
+        raise NativeError("Argument must be a number.")
+    return value
+
+
+def check_string(value) -> str:
+    if type(value) is not str:
+        raise NativeError("Argument must be a string.")
+    return value
+
+
+def check_list(value) -> list[object]:
+    if type(value) is not LoxList:
+        raise NativeError("Argument must be a list.")
+    return value.items
+
+
+def check_index(value) -> int:
+    if type(value) is not float or not value.is_integer() or value < 0:
+        raise NativeError("Index must be a non-negative integer.")
+    return int(value)
+
+
+def domain(function, *arguments) -> float:
+    try:
+        return float(function(*arguments))
+    except (ValueError, OverflowError, ZeroDivisionError):
+        raise NativeError("Math domain error.") from None
+
+
+@native("core")
+def clock():
+    return time.time()
+
+
+@native("math", "abs")
+def absolute(x):
+    return abs(check_number(x))
+
+
+@native("math")
+def floor(x):
+    x = check_number(x)
+    return float(math.floor(x)) if math.isfinite(x) else x
+
+
+@native("math")
+def ceil(x):
+    x = check_number(x)
+    return float(math.ceil(x)) if math.isfinite(x) else x
+
+
+@native("math", "round")
+def round_half_away(x):
+    # Halves go away from zero, not to the even neighbour as in Python.
+    # Adding 0.5 first would round 0.49999999999999994 up, since the sum
+    # itself rounds to 1. The fraction is exact, so it is compared instead.
+    x = check_number(x)
+    if not math.isfinite(x):
+        return x
+    whole = math.floor(abs(x))
+    if abs(x) - whole >= 0.5:
+        whole += 1
+    return math.copysign(float(whole), x)
+
+
+@native("math")
+def sqrt(x):
+    return domain(math.sqrt, check_number(x))
+
+
+@native("math", "pow")
+def power(x, y):
+    return domain(math.pow, check_number(x), check_number(y))
+
+
+@native("math")
+def exp(x):
+    return domain(math.exp, check_number(x))
+
+
+@native("math")
+def log(x):
+    return domain(math.log, check_number(x))
+
+
+@native("math")
+def sin(x):
+    return domain(math.sin, check_number(x))
+
+
+@native("math")
+def cos(x):
+    return domain(math.cos, check_number(x))
+
+
+@native("math")
+def tan(x):
+    return domain(math.tan, check_number(x))
+
+
+@native("math")
+def atan(x):
+    return math.atan(check_number(x))
+
+
+@native("math", "min")
+def minimum(x, y):
+    return min(check_number(x), check_number(y))
+
+
+@native("math", "max")
+def maximum(x, y):
+    return max(check_number(x), check_number(y))
+
+
+@native("string", "len")
+def length(value):
+    if type(value) is LoxList:
+        return float(len(value.items))
+    return float(len(check_string(value)))
+
+
+@native("string")
+def substr(text, start, count):
+    start = check_index(start)
+    return check_string(text)[start:start + check_index(count)]
+
+
+@native("string", "indexOf")
+def index_of(text, part):
+    return float(check_string(text).find(check_string(part)))
+
+
+@native("string")
+def upper(text):
+    return check_string(text).upper()
+
+
+@native("string")
+def lower(text):
+    return check_string(text).lower()
+
+
+@native("string")
+def trim(text):
+    return check_string(text).strip()
+
+
+@native("string")
+def replace(text, old, new):
+    return check_string(text).replace(check_string(old), check_string(new))
+
+
+@native("string")
+def repeat(text, count):
+    text = check_string(text)
+    count = check_index(count)
+    if count > MAX_REPEAT_LENGTH // max(len(text), 1):
+        raise NativeError("Repeated string would be too long.")
+    return text * count
+
+
+@native("number", "num")
+def parse_number(text):
+    # Takes the same numbers as Lox source does, and gives nil for anything
+    # else.
+    text = check_string(text).strip()
+    digits = text.removeprefix("-")
+    whole, dot, fraction = digits.partition(".")
+    if not (whole.isdigit() and whole.isascii()) or (
+            dot and not (fraction.isdigit() and fraction.isascii())):
+        return None
+    return float(text)
+
+
+@native("number", "str", with_interpreter=True)
+def to_string(interpreter, value):
+    return interpreter.stringify(value)
+
+
+@native("number")
+def fixed(x, digits):
+    # Halves go away from zero as in round, where format would round them to
+    # even. The Decimal holds x exactly, so only true halves round up.
+    x = check_number(x)
+    digits = check_index(digits)
+    if digits > MAX_FIXED_DIGITS:
+        raise NativeError(f"Digits must be at most {MAX_FIXED_DIGITS}.")
+    if not math.isfinite(x):
+        return f"{x:f}"
+    place = Decimal(1).scaleb(-digits)
+    return f"{Decimal(x).quantize(place, ROUND_HALF_UP, FIXED_CONTEXT):f}"
+
+
+@native("io", "readFile")
+def read_file(path):
+    try:
+        with open(check_string(path), encoding="utf-8") as file:
+            return file.read()
+    except (OSError, UnicodeDecodeError):
+        raise NativeError(f"Could not read file '{path}'.") from None
+
+
+@native("io", "writeFile")
+def write_file(path, text):
+    text = check_string(text)
+    try:
+        with open(check_string(path), "w", encoding="utf-8") as file:
+            file.write(text)
+    except OSError:
+        raise NativeError(f"Could not write file '{path}'.") from None
+    return None
+
+
+@native("list", "list")
+def new_list():
+    return LoxList()
+
+
+@native("list")
+def get(items, index):
+    items = check_list(items)
+    index = check_index(index)
+    if index >= len(items):
+        raise NativeError("Index out of range.")
+    return items[index]
+
+
+@native("list", "set")
+def set_item(items, index, value):
+    items = check_list(items)
+    index = check_index(index)
+    if index >= len(items):
+        raise NativeError("Index out of range.")
+    items[index] = value
+    return value
+
+
+@native("list")
+def push(items, value):
+    check_list(items).append(value)
+    return None
+
+
+@native("list", "sum")
+def total(items):
+    items = check_list(items)
+    if not set(map(type, items)) <= {float}:
+        raise NativeError("Can only sum a list of numbers.")
+    return sum(items, 0.0)
+
+
+@native("list", "map", with_interpreter=True)
+def map_list(interpreter, items, function):
+    items = check_list(items)
+    if not isinstance(function, LoxCallable) or function.arity() != 1:
+        raise NativeError("Expected a function of one argument.")
+    # Natives that need nothing of the interpreter run in one C-level map.
+    if type(function) is NativeFunction and not function.with_interpreter:
+        return LoxList(list(map(function.function, items)))
+    return LoxList([function.call(interpreter, [item]) for item in items])
+
+
+@native("list")
+def sort(items):
+    items = check_list(items)
+    kinds = set(map(type, items))
+    if len(kinds) > 1 or not kinds <= {float, str}:
+        raise NativeError("Can only sort a list of all numbers or all strings.")
+    items.sort()
+    return None
+
+
+@native("list", "slice")
+def slice_list(items, start, end):
+    return LoxList(check_list(items)[check_index(start):check_index(end)])
+
+
+@native("list", with_interpreter=True)
+def join(interpreter, items, separator):
+    items = check_list(items)
+    separator = check_string(separator)
+    if set(map(type, items)) <= {str}:
+        return separator.join(items)
+    return separator.join(map(interpreter.stringify, items))
+
+
+@native("list")
+def split(text, separator):
+    text = check_string(text)
+    separator = check_string(separator)
+    # An empty separator splits the text into its characters.
+    if not separator:
+        return LoxList(list(text))
+    return LoxList(text.split(separator))
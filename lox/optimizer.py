@@ -0,0 +1,166 @@
+from lox.expr import Expr, Binary, Grouping, Literal, Unary, Variable, Assign, Logical, Call
+from lox.stmt import Stmt, Block, Expression, If, Print, Var, While, Function, Return
+from lox.token import TokenType
+
+NUMBER_OPERATORS = {
+    TokenType.MINUS: lambda a, b: a - b,
+    TokenType.STAR: lambda a, b: a * b,
+    TokenType.SLASH: lambda a, b: a / b,
+    TokenType.GREATER: lambda a, b: a > b,
+    TokenType.GREATER_EQUAL: lambda a, b: a >= b,
+    TokenType.LESS: lambda a, b: a < b,
+    TokenType.LESS_EQUAL: lambda a, b: a <= b,
+}
+
+
+# Rewrites resolved trees into new ones: folds constant subexpressions, drops
+# Grouping wrappers, branches and loops with constant conditions, and
+# statements after a return. Nodes are never changed once built, and nodes
+# keep their resolver annotations. Anything that would
+# fail at runtime is left alone so the error is still raised, with its line,
+# when it executes.
+class Optimizer(Expr.Visitor, Stmt.Visitor):
+
+    def optimize(self, statements: list[Stmt]) -> list[Stmt]:
+        optimized: list[Stmt] = []
+        for statement in statements:
+            statement = self.statement(statement)
+            if statement is None:
+                continue
+            optimized.append(statement)
+            if isinstance(statement, Return):
+                break
+        return optimized
+
+    def statement(self, stmt: Stmt) -> Stmt | None:
+        return stmt.accept(self)
+
+    def expression(self, expr: Expr) -> Expr:
+        return expr.accept(self)
+
+    def visit_stmt_block(self, stmt: Block):
+        block = Block(self.optimize(stmt.statements))
+        block.bare = stmt.bare
+        return block
+
+    def visit_stmt_expression(self, stmt: Expression):
+        return Expression(self.expression(stmt.expression))
+
+    def visit_stmt_function(self, stmt: Function):
+        return Function(stmt.name, stmt.params, self.optimize(stmt.body))
+
+    def visit_stmt_if(self, stmt: If):
+        condition = self.expression(stmt.condition)
+        if isinstance(condition, Literal):
+            if self.is_truthy(condition.value):
+                return self.statement(stmt.then_branch)
+            if stmt.else_branch is None:
+                return None
+            return self.statement(stmt.else_branch)
+
+        else_branch = stmt.else_branch
+        if else_branch is not None:
+            else_branch = self.statement(else_branch)
+        return If(condition, self.branch(stmt.then_branch), else_branch)
+
+    def visit_stmt_print(self, stmt: Print):
+        return Print(self.expression(stmt.expression))
+
+    def visit_stmt_return(self, stmt: Return):
+        if stmt.value is None:
+            return stmt
+        return Return(stmt.keyword, self.expression(stmt.value))
+
+    def visit_stmt_var(self, stmt: Var):
+        if stmt.initializer is None:
+            return stmt
+        return Var(stmt.name, self.expression(stmt.initializer))
+
+    def visit_stmt_while(self, stmt: While):
+        condition = self.expression(stmt.condition)
+        if isinstance(condition, Literal) and not self.is_truthy(condition.value):
+            return None
+        loop = While(condition, self.branch(stmt.body))
+        loop.reuse = stmt.reuse
+        return loop
+
+    def branch(self, stmt: Stmt) -> Stmt:
+        # A branch must stay a statement even when it optimizes away.
+        stmt = self.statement(stmt)
+        if stmt is None:
+            stmt = Block([])
+            stmt.bare = True
+        return stmt
+
+    def visit_expr_assign(self, expr: Assign):
+        assign = Assign(expr.name, self.expression(expr.value))
+        assign.depth = expr.depth
+        assign.slot = expr.slot
+        return assign
+
+    def visit_expr_binary(self, expr: Binary):
+        expr = Binary(self.expression(expr.left), expr.operator,
+                      self.expression(expr.right))
+        if not isinstance(expr.left, Literal) or not isinstance(expr.right, Literal):
+            return expr
+
+        left = expr.left.value
+        right = expr.right.value
+        operator = expr.operator.token_type
+
+        if operator == TokenType.EQUAL_EQUAL:
+            return Literal(left == right)
+        if operator == TokenType.BANG_EQUAL:
+            return Literal(left != right)
+
+        kind = type(left)
+        if operator == TokenType.PLUS:
+            if kind is type(right) and (kind is float or kind is str):
+                return Literal(left + right)
+            return expr
+
+        if kind is not float or type(right) is not float:
+            return expr
+        if operator == TokenType.SLASH and right == 0:
+            return expr
+        return Literal(NUMBER_OPERATORS[operator](left, right))
+
+    def visit_expr_call(self, expr: Call):
+        return Call(self.expression(expr.callee), expr.paren,
+                    [self.expression(argument) for argument in expr.arguments])
+
+    def visit_expr_grouping(self, expr: Grouping):
+        return self.expression(expr.expression)
+
+    def visit_expr_literal(self, expr: Literal):
+        return expr
+
+    def visit_expr_logical(self, expr: Logical):
+        left = self.expression(expr.left)
+        right = self.expression(expr.right)
+        if not isinstance(left, Literal):
+            return Logical(left, expr.operator, right)
+
+        if expr.operator.token_type == TokenType.OR:
+            short_circuits = self.is_truthy(left.value)
+        else:
+            short_circuits = not self.is_truthy(left.value)
+        return left if short_circuits else right
+
+    def visit_expr_unary(self, expr: Unary):
+        expr = Unary(expr.operator, self.expression(expr.right))
+        if not isinstance(expr.right, Literal):
+            return expr
+
+        value = expr.right.value
+        if expr.operator.token_type == TokenType.BANG:
+            return Literal(not self.is_truthy(value))
+        if type(value) is float:
+            return Literal(-value)
+        return expr
+
+    def visit_expr_variable(self, expr: Variable):
+        return expr
+
+    def is_truthy(self, value: object) -> bool:
+        return value is not None and value is not False
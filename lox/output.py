@@ -0,0 +1,67 @@
+import sys
+from io import TextIOBase
+
+FLUSH_EVERY = 1024
+
+
+# Where `print` statements go. Engines call print() with the text of each
+# printed value; whoever owns the sink calls flush() once the code is done.
+class Output:
+
+    def print(self, text: str):
+        pass
+
+    def flush(self):
+        pass
+
+
+# Keeps printed lines and writes them out together, one write for many
+# lines instead of a print() call each.
+class BufferedOutput(Output):
+
+    def __init__(self, stream: TextIOBase | None = None, flush_every: int | None = None):
+        # Written to sys.stdout, as it is when flushing, when None.
+        self.stream = stream
+        # Lines held before they are written. A terminal gets each line as it
+        # is printed, anything else gets them in blocks.
+        if flush_every is None:
+            flush_every = 1 if (stream or sys.stdout).isatty() else FLUSH_EVERY
+        self.flush_every = flush_every
+        self.pending: list[str] = []
+
+    def print(self, text: str):
+        pending = self.pending
+        pending.append(text)
+        if len(pending) >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        if self.pending:
+            self.pending.append("")
+            stream = self.stream or sys.stdout
+            stream.write("\n".join(self.pending))
+            stream.flush()
+            self.pending.clear()
+
+
+# Keeps everything printed in memory.
+class CaptureOutput(Output):
+
+    def __init__(self):
+        self.lines: list[str] = []
+
+    def print(self, text: str):
+        self.lines.append(text)
+
+    def getvalue(self) -> str:
+        return "".join(line + "\n" for line in self.lines)
+
+
+class FileOutput(BufferedOutput):
+
+    def __init__(self, path: str, flush_every: int = FLUSH_EVERY):
+        super().__init__(open(path, "w", encoding="utf-8"), flush_every)
+
+    def close(self):
+        self.flush()
+        self.stream.close()
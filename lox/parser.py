@@ -1,21 +1,36 @@
+from collections.abc import Iterable, Iterator
 from lox.token import Token, TokenType
+from lox.error import ErrorReporter
 from lox.expr import Expr, Binary, Grouping, Literal, Unary, Variable, Assign, Logical, Call
 from lox.stmt import Stmt, Print, Expression, Var, Block, If, While, Function, Return
 
 
+# Deepest nesting of groupings, unary operators, assignments, calls and
+# blocks accepted. Every later pass walks the tree by recursion, so this
+# keeps them all within Python's own stack. Operator chains are left to the
+# resolver, which reports those too long to walk.
+MAX_NESTING = 150
+
+
 class ParseError(Exception):
     def __init__(self, token: Token, message: str):
         self.token = token
         self.message = message
 
 
+# Looks at no more than the current token and the one before it, so tokens
+# can come from a list or straight from a streaming scanner.
 class Parser:
-    tokens: list[Token]
-    current: int
+    tokens: Iterator[Token]
+    current: Token
+    last: Token | None
 
-    def __init__(self, tokens: list[Token]):
-        self.tokens = tokens
-        self.current = 0
+    def __init__(self, tokens: Iterable[Token], reporter: ErrorReporter | None = None):
+        self.tokens = iter(tokens)
+        self.reporter = reporter or ErrorReporter()
+        self.current = next(self.tokens)
+        self.last = None
+        self.nesting = 0
 
     def parse(self):
         statements: list[Stmt] = []
@@ -28,6 +43,7 @@ class Parser:
         return statements
 
     def declaration(self) -> Stmt:
+        nesting = self.nesting
         try:
             if self.match(TokenType.FUN):
                 return self.function("function")
@@ -35,6 +51,14 @@ class Parser:
                 return self.var_declaration()
             return self.statement()
         except ParseError as error:
+            self.nesting = nesting
+            self.synchronize()
+            return None
+        except RecursionError:
+            # Deeply parenthesized code can exhaust the parser's own
+            # recursion before reaching the nesting limit.
+            self.nesting = nesting
+            self.error(self.peek(), "Too much nesting.")
             self.synchronize()
             return None
 
@@ -102,11 +126,22 @@ class Parser:
             return Block(self.block())
         return self.expression_statement()
 
+    def nested_statement(self) -> Stmt:
+        self.nest()
+        stmt = self.statement()
+        self.nesting -= 1
+        return stmt
+
+    def nest(self):
+        self.nesting += 1
+        if self.nesting > MAX_NESTING:
+            raise self.error(self.peek(), "Too much nesting.")
+
     def while_statement(self):
         self.consume(TokenType.LEFT_PAREN, "Expect '(' after 'while'.")
         condition: Expr = self.expression()
         self.consume(TokenType.RIGHT_PAREN, "Expect ')' after condition.")
-        body: Stmt = self.statement()
+        body: Stmt = self.nested_statement()
 
         return While(condition, body)
 
@@ -131,7 +166,7 @@ class Parser:
             increment = self.expression()
         self.consume(TokenType.RIGHT_PAREN, "Expect ')' after for clauses.")
 
-        body: Stmt = self.statement()
+        body: Stmt = self.nested_statement()
 
         if increment is not None:
             body = Block([
@@ -158,11 +193,11 @@ class Parser:
         condition: Expr = self.expression()
         self.consume(TokenType.RIGHT_PAREN, "Expect ')' after if condition.")
 
-        then_branch: Stmt = self.statement()
+        then_branch: Stmt = self.nested_statement()
         else_branch: Stmt = None
 
         if (self.match(TokenType.ELSE)):
-            else_branch = self.statement()
+            else_branch = self.nested_statement()
 
         return If(condition, then_branch, else_branch)
 
@@ -178,23 +213,30 @@ class Parser:
 
     def block(self) -> list[Stmt]:
         statements: list[Stmt] = []
+        self.nest()
 
         while (not self.check(TokenType.RIGHT_BRACE) and not self.is_at_end()):
             statements.append(self.declaration())
 
         self.consume(TokenType.RIGHT_BRACE, "Expect '}' after block.")
+        self.nesting -= 1
 
         return statements
 
     def expression(self) -> Expr:
-        return self.assignment()
+        self.nest()
+        expr = self.assignment()
+        self.nesting -= 1
+        return expr
 
     def assignment(self) -> Expr:
         expr: Expr = self.logical_or()
 
         if (self.match(TokenType.EQUAL)):
             equals: Token = self.previous()
+            self.nest()
             value: Expr = self.assignment()
+            self.nesting -= 1
 
             if isinstance(expr, Variable):
                 name = expr.name
@@ -263,7 +305,9 @@ class Parser:
     def unary(self) -> Expr:
         if self.match(TokenType.BANG, TokenType.MINUS):
             operator = self.previous()
+            self.nest()
             right: Expr = self.unary()
+            self.nesting -= 1
             return Unary(operator, right)
         return self.call()
 
@@ -272,7 +316,9 @@ class Parser:
 
         while True:
             if (self.match(TokenType.LEFT_PAREN)):
+                self.nest()
                 expr = self.finish_call(expr)
+                self.nesting -= 1
             else:
                 break
 
@@ -324,17 +370,18 @@ class Parser:
 
     def advance(self) -> Token:
         if not self.is_at_end():
-            self.current += 1
-        return self.previous()
+            self.last = self.current
+            self.current = next(self.tokens)
+        return self.last
 
     def is_at_end(self) -> bool:
         return self.peek().token_type == TokenType.EOF
 
     def peek(self) -> Token:
-        return self.tokens[self.current]
+        return self.current
 
     def previous(self) -> Token:
-        return self.tokens[self.current - 1]
+        return self.last
 
     def consume(self, type: TokenType, message: str):
         if self.check(type):
@@ -342,8 +389,7 @@ class Parser:
         raise self.error(self.peek(), message)
 
     def error(self, token: Token, message):
-        from lox.lox import Lox
-        Lox.error(token.line, message)
+        self.reporter.error(token.line, message)
         return ParseError(token, message)
 
     def synchronize(self):
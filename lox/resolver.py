@@ -0,0 +1,204 @@
+from enum import Enum
+from lox.token import Token
+from lox.error import ErrorReporter
+from lox.expr import Expr, Binary, Grouping, Literal, Unary, Variable, Assign, Logical, Call
+from lox.stmt import Stmt, Block, Expression, If, Print, Var, While, Function, Return
+
+
+class FunctionType(Enum):
+    NONE = 1
+    FUNCTION = 2
+
+
+class Resolver(Expr.Visitor, Stmt.Visitor):
+
+    def __init__(self, reporter: ErrorReporter | None = None):
+        self.reporter = reporter or ErrorReporter()
+        self.scopes: list[dict[str, bool]] = []
+        self.slots: list[dict[str, int]] = []
+        self.current_function: FunctionType = FunctionType.NONE
+        self.functions = 0
+
+    def resolve(self, statements: list[Stmt]):
+        for statement in statements:
+            self.resolve_stmt(statement)
+
+    def resolve_stmt(self, stmt: Stmt):
+        stmt.accept(self)
+
+    def resolve_expr(self, expr: Expr):
+        try:
+            expr.accept(self)
+        except RecursionError:
+            # The parser bounds nesting, but not chains like 1 + 1 + ...,
+            # which nest the tree once per operator. The deepest link of the
+            # chain that has room to report it does.
+            if isinstance(expr, (Binary, Logical)):
+                self.error(expr.operator, "Too much nesting.")
+            elif isinstance(expr, Call):
+                self.error(expr.paren, "Too much nesting.")
+            else:
+                raise
+
+    def visit_stmt_block(self, stmt: Block):
+        # A block that declares nothing gets no scope, and so no environment
+        # when it runs.
+        if not any(isinstance(statement, (Var, Function))
+                   for statement in stmt.statements):
+            stmt.bare = True
+            self.resolve(stmt.statements)
+            return None
+
+        self.begin_scope()
+        self.resolve(stmt.statements)
+        self.end_scope()
+        return None
+
+    def visit_stmt_expression(self, stmt: Expression):
+        self.resolve_expr(stmt.expression)
+        return None
+
+    def visit_stmt_function(self, stmt: Function):
+        self.declare(stmt.name)
+        self.define(stmt.name)
+        self.functions += 1
+
+        self.resolve_function(stmt, FunctionType.FUNCTION)
+        return None
+
+    def visit_stmt_if(self, stmt: If):
+        self.resolve_expr(stmt.condition)
+        self.resolve_stmt(stmt.then_branch)
+        if stmt.else_branch is not None:
+            self.resolve_stmt(stmt.else_branch)
+        return None
+
+    def visit_stmt_print(self, stmt: Print):
+        self.resolve_expr(stmt.expression)
+        return None
+
+    def visit_stmt_return(self, stmt: Return):
+        if self.current_function == FunctionType.NONE:
+            self.error(stmt.keyword, "Can't return from top-level code.")
+
+        if stmt.value is not None:
+            self.resolve_expr(stmt.value)
+        return None
+
+    def visit_stmt_var(self, stmt: Var):
+        self.declare(stmt.name)
+        if stmt.initializer is not None:
+            self.resolve_expr(stmt.initializer)
+        self.define(stmt.name)
+        return None
+
+    def visit_stmt_while(self, stmt: While):
+        self.resolve_expr(stmt.condition)
+        functions = self.functions
+        self.resolve_stmt(stmt.body)
+        # Without a function declared in it, nothing can keep a body's
+        # environment past its iteration, so one can serve every iteration.
+        if self.functions == functions and self.reusable(stmt.body):
+            stmt.reuse = True
+        return None
+
+    def reusable(self, body: Stmt) -> bool:
+        if not isinstance(body, Block):
+            return False
+        if not body.bare:
+            return True
+        # A for loop with an increment pairs its body with the increment in a
+        # block of their own. That block declares nothing, so it is the
+        # body's block in it whose environment is reused.
+        return (len(body.statements) == 2
+                and isinstance(body.statements[0], Block)
+                and not body.statements[0].bare
+                and isinstance(body.statements[1], Expression))
+
+    def visit_expr_assign(self, expr: Assign):
+        self.resolve_expr(expr.value)
+        self.resolve_local(expr, expr.name)
+        return None
+
+    def visit_expr_binary(self, expr: Binary):
+        self.resolve_expr(expr.left)
+        self.resolve_expr(expr.right)
+        return None
+
+    def visit_expr_call(self, expr: Call):
+        self.resolve_expr(expr.callee)
+
+        for argument in expr.arguments:
+            self.resolve_expr(argument)
+        return None
+
+    def visit_expr_grouping(self, expr: Grouping):
+        self.resolve_expr(expr.expression)
+        return None
+
+    def visit_expr_literal(self, expr: Literal):
+        return None
+
+    def visit_expr_logical(self, expr: Logical):
+        self.resolve_expr(expr.left)
+        self.resolve_expr(expr.right)
+        return None
+
+    def visit_expr_unary(self, expr: Unary):
+        self.resolve_expr(expr.right)
+        return None
+
+    def visit_expr_variable(self, expr: Variable):
+        if self.scopes and self.scopes[-1].get(expr.name.lexeme) is False:
+            self.error(expr.name,
+                       "Can't read local variable in its own initializer.")
+
+        self.resolve_local(expr, expr.name)
+        return None
+
+    def resolve_function(self, function: Function, function_type: FunctionType):
+        enclosing_function: FunctionType = self.current_function
+        self.current_function = function_type
+
+        self.begin_scope()
+        for param in function.params:
+            self.declare(param)
+            self.define(param)
+        self.resolve(function.body)
+        self.end_scope()
+
+        self.current_function = enclosing_function
+
+    def begin_scope(self):
+        self.scopes.append({})
+        self.slots.append({})
+
+    def end_scope(self):
+        self.scopes.pop()
+        self.slots.pop()
+
+    def declare(self, name: Token):
+        if not self.scopes:
+            return
+
+        scope: dict[str, bool] = self.scopes[-1]
+        if name.lexeme in scope:
+            self.error(name, "Already a variable with this name in this scope.")
+
+        self.slots[-1][name.lexeme] = len(scope)
+        scope[name.lexeme] = False
+
+    def define(self, name: Token):
+        if not self.scopes:
+            return
+        self.scopes[-1][name.lexeme] = True
+
+    def resolve_local(self, expr: Variable | Assign, name: Token):
+        for i in range(len(self.scopes) - 1, -1, -1):
+            if name.lexeme in self.scopes[i]:
+                expr.depth = len(self.scopes) - 1 - i
+                expr.slot = self.slots[i][name.lexeme]
+                return
+
+    def error(self, token: Token, message: str):
+        self.reporter.error(token.line, message)
@@ -1,4 +1,6 @@
+from sys import intern
 from lox.token import Token, TokenType
+from lox.error import ErrorReporter
 
 
 class Scanner:
@@ -21,8 +23,9 @@ class Scanner:
         "while": TokenType.WHILE
     }
 
-    def __init__(self, source: str):
+    def __init__(self, source: str, reporter: ErrorReporter | None = None):
         self.source = source
+        self.reporter = reporter or ErrorReporter()
         self.tokens: list[Token] = []
         self.current = 0
         self.line = 1
@@ -110,8 +113,7 @@ class Scanner:
         return True
 
     def error(self, message: str):
-        from lox.lox import Lox
-        Lox.error(self.line, message)
+        self.reporter.error(self.line, message)
 
     def peek(self) -> str:
         if self.is_at_end():
@@ -150,4 +152,4 @@ class Scanner:
             self.advance()
         text = self.source[self.start:self.current]
         token_type = self.keywords.get(text, TokenType.IDENTIFIER)
-        self.add_token(token_type)
+        self.tokens.append(Token(token_type, intern(text), None, self.line))
@@ -3,6 +3,7 @@ from lox.expr import Expr
 
 
 class Stmt:
+    __slots__ = ()
 
     class Visitor:
         def visit_stmt_block(self, stmt: 'Block'):
@@ -32,76 +33,121 @@ class Stmt:
     def accept(self, visitor: Visitor):
         pass
 
+    def key(self) -> tuple:
+        pass
+
+    def __eq__(self, other):
+        return type(other) is type(self) and self.key() == other.key()
+
+    def __hash__(self):
+        return hash(self.key())
+
 
 class Block(Stmt):
+    __slots__ = ("statements", "bare")
+
     statements: list[Stmt]
+    bare: bool | None
 
     def __init__(self, statements):
         self.statements = statements
+        self.bare = None
 
-    def accept(self, visitor: Expr.Visitor):
+    def accept(self, visitor: Stmt.Visitor):
         return visitor.visit_stmt_block(self)
 
+    def key(self) -> tuple:
+        return (Block, tuple(item.key() for item in self.statements))
+
 
 class Expression(Stmt):
+    __slots__ = ("expression",)
+
     expression: Expr
 
     def __init__(self, expression):
         self.expression = expression
 
-    def accept(self, visitor: Expr.Visitor):
+    def accept(self, visitor: Stmt.Visitor):
         return visitor.visit_stmt_expression(self)
 
+    def key(self) -> tuple:
+        return (Expression, self.expression.key())
+
 
 class If(Stmt):
+    __slots__ = ("condition", "then_branch", "else_branch")
+
     condition: Expr
     then_branch: Stmt
-    else_branch: Stmt
+    else_branch: Stmt | None
 
     def __init__(self, condition, then_branch, else_branch):
         self.condition = condition
         self.then_branch = then_branch
         self.else_branch = else_branch
 
-    def accept(self, visitor: Expr.Visitor):
+    def accept(self, visitor: Stmt.Visitor):
         return visitor.visit_stmt_if(self)
 
+    def key(self) -> tuple:
+        return (If, self.condition.key(), self.then_branch.key(), None if self.else_branch is None else self.else_branch.key())
+
 
 class Print(Stmt):
+    __slots__ = ("expression",)
+
     expression: Expr
 
     def __init__(self, expression):
         self.expression = expression
 
-    def accept(self, visitor: Expr.Visitor):
+    def accept(self, visitor: Stmt.Visitor):
         return visitor.visit_stmt_print(self)
 
+    def key(self) -> tuple:
+        return (Print, self.expression.key())
+
 
 class Var(Stmt):
+    __slots__ = ("name", "initializer")
+
     name: Token
-    initializer: Expr
+    initializer: Expr | None
 
     def __init__(self, name, initializer):
         self.name = name
         self.initializer = initializer
 
-    def accept(self, visitor: Expr.Visitor):
+    def accept(self, visitor: Stmt.Visitor):
         return visitor.visit_stmt_var(self)
 
+    def key(self) -> tuple:
+        return (Var, self.name.key(), None if self.initializer is None else self.initializer.key())
+
 
 class While(Stmt):
+    __slots__ = ("condition", "body", "reuse")
+
     condition: Expr
     body: Stmt
+    reuse: bool | None
 
     def __init__(self, condition, body):
         self.condition = condition
         self.body = body
+        self.reuse = None
 
-    def accept(self, visitor: Expr.Visitor):
+    def accept(self, visitor: Stmt.Visitor):
         return visitor.visit_stmt_while(self)
 
+    def key(self) -> tuple:
+        return (While, self.condition.key(), self.body.key())
+
 
 class Function(Stmt):
+    __slots__ = ("name", "params", "body")
+
     name: Token
     params: list[Token]
     body: list[Stmt]
@@ -111,17 +157,25 @@ class Function(Stmt):
         self.params = params
         self.body = body
 
-    def accept(self, visitor: Expr.Visitor):
+    def accept(self, visitor: Stmt.Visitor):
         return visitor.visit_stmt_function(self)
 
+    def key(self) -> tuple:
+        return (Function, self.name.key(), tuple(item.key() for item in self.params), tuple(item.key() for item in self.body))
+
 
 class Return(Stmt):
+    __slots__ = ("keyword", "value")
+
     keyword: Token
-    value: Expr
+    value: Expr | None
 
     def __init__(self, keyword, value):
         self.keyword = keyword
         self.value = value
 
-    def accept(self, visitor: Expr.Visitor):
+    def accept(self, visitor: Stmt.Visitor):
         return visitor.visit_stmt_return(self)
+
+    def key(self) -> tuple:
+        return (Return, self.keyword.key(), None if self.value is None else self.value.key())
@@ -52,12 +52,19 @@ class TokenType(Enum):
 
 
 class Token:
+    __slots__ = ("token_type", "lexeme", "literal", "line")
+
     def __init__(self, token_type: TokenType, lexeme: str, literal, line: int):
         self.token_type = token_type
         self.lexeme = lexeme
         self.literal = literal
         self.line = line
 
+    # Tokens themselves compare by identity, since passes use declaration
+    # tokens to tell variables apart; syntax tree nodes compare by this key.
+    def key(self) -> tuple:
+        return (self.token_type, self.lexeme, self.line)
+
     def __rper__(self):
         return f"{self.token_type.name} {self.lexeme} {self.literal if self.literal is not None else 'null'}"
 
@@ -0,0 +1,516 @@
+import math
+from lox.expr import Expr, Literal, Grouping, Unary, Binary, Variable, Assign, Logical, Call
+from lox.stmt import Stmt, Block, Expression, If, Print, Var, While, Function, Return
+from lox.token import Token, TokenType
+from lox.error import LoxRuntimeError, NativeError
+from lox.lox_callable import LoxCallable
+
+
+# Finds the locals that closures capture. A captured local declared inside a
+# loop gets a fresh Lox environment on every iteration, but a Python closure
+# cell is shared by all iterations, so those locals are boxed instead.
+class CaptureAnalyzer(Expr.Visitor, Stmt.Visitor):
+
+    def __init__(self):
+        # Each scope holds its declarations in slot order, plus the nesting
+        # level of the function that owns it.
+        self.scopes: list[tuple[list[Token], int]] = []
+        self.functions: list[Function] = []
+        self.loop_depths: list[int] = [0]
+        self.declared_in_loop: set[Token] = set()
+        self.captured: set[Token] = set()
+        # The locals of enclosing functions each function refers to,
+        # including through its own nested functions, keyed by the token
+        # naming the function.
+        self.free: dict[Token, set[Token]] = {}
+
+    def analyze(self, statements: list[Stmt]):
+        for statement in statements:
+            statement.accept(self)
+
+    def boxed(self) -> set[Token]:
+        return self.captured & self.declared_in_loop
+
+    def declare(self, name: Token):
+        if not self.scopes:
+            return
+        self.scopes[-1][0].append(name)
+        if self.loop_depths[-1] > 0:
+            self.declared_in_loop.add(name)
+
+    def reference(self, expr: Variable | Assign):
+        if expr.depth is None:
+            return
+        declarations, level = self.scopes[-1 - expr.depth]
+        declaration = declarations[expr.slot]
+
+        if level < len(self.functions):
+            self.captured.add(declaration)
+            for function in self.functions[level:]:
+                self.free[function.name].add(declaration)
+
+    def visit_stmt_block(self, stmt: Block):
+        if stmt.bare:
+            self.analyze(stmt.statements)
+            return
+        self.scopes.append(([], len(self.functions)))
+        self.analyze(stmt.statements)
+        self.scopes.pop()
+
+    def visit_stmt_expression(self, stmt: Expression):
+        stmt.expression.accept(self)
+
+    def visit_stmt_print(self, stmt: Print):
+        stmt.expression.accept(self)
+
+    def visit_stmt_var(self, stmt: Var):
+        self.declare(stmt.name)
+        if stmt.initializer is not None:
+            stmt.initializer.accept(self)
+
+    def visit_stmt_if(self, stmt: If):
+        stmt.condition.accept(self)
+        stmt.then_branch.accept(self)
+        if stmt.else_branch is not None:
+            stmt.else_branch.accept(self)
+
+    def visit_stmt_while(self, stmt: While):
+        self.loop_depths[-1] += 1
+        stmt.condition.accept(self)
+        stmt.body.accept(self)
+        self.loop_depths[-1] -= 1
+
+    def visit_stmt_function(self, stmt: Function):
+        self.declare(stmt.name)
+
+        self.free[stmt.name] = set()
+        self.functions.append(stmt)
+        self.loop_depths.append(0)
+        self.scopes.append((list(stmt.params), len(self.functions)))
+        self.analyze(stmt.body)
+        self.scopes.pop()
+        self.loop_depths.pop()
+        self.functions.pop()
+
+    def visit_stmt_return(self, stmt: Return):
+        if stmt.value is not None:
+            stmt.value.accept(self)
+
+    def visit_expr_assign(self, expr: Assign):
+        expr.value.accept(self)
+        self.reference(expr)
+
+    def visit_expr_variable(self, expr: Variable):
+        self.reference(expr)
+
+    def visit_expr_binary(self, expr: Binary):
+        expr.left.accept(self)
+        expr.right.accept(self)
+
+    def visit_expr_logical(self, expr: Logical):
+        expr.left.accept(self)
+        expr.right.accept(self)
+
+    def visit_expr_unary(self, expr: Unary):
+        expr.right.accept(self)
+
+    def visit_expr_grouping(self, expr: Grouping):
+        expr.expression.accept(self)
+
+    def visit_expr_call(self, expr: Call):
+        expr.callee.accept(self)
+        for argument in expr.arguments:
+            argument.accept(self)
+
+    def visit_expr_literal(self, expr: Literal):
+        pass
+
+
+class PythonFunction:
+    def __init__(self, enclosing: 'PythonFunction | None'):
+        self.enclosing = enclosing
+        self.lines: list[str] = []
+        self.nonlocals: set[str] = set()
+
+
+# Transpiles a resolved statement list into the source of a Python module
+# whose `_main` function runs the program. Lox locals become Python locals
+# (one uniquely named variable per declaration), Lox globals stay in the
+# interpreter's globals dict, and every operation that can fail at runtime
+# keeps the Token it reports its line from.
+class Transpiler(Expr.Visitor, Stmt.Visitor):
+    NUMBER_OPERATORS = {
+        TokenType.MINUS: "-",
+        TokenType.STAR: "*",
+        TokenType.SLASH: "/",
+        TokenType.GREATER: ">",
+        TokenType.GREATER_EQUAL: ">=",
+        TokenType.LESS: "<",
+        TokenType.LESS_EQUAL: "<=",
+    }
+    COMPARISONS = (TokenType.GREATER, TokenType.GREATER_EQUAL, TokenType.LESS,
+                   TokenType.LESS_EQUAL, TokenType.EQUAL_EQUAL, TokenType.BANG_EQUAL)
+
+    def __init__(self):
+        self.constants: dict[str, object] = {}
+        self.boxed: set[Token] = set()
+        self.free: dict[Token, set[Token]] = {}
+        # Python names of the locals in each scope, in slot order, and the
+        # Python function owning the scope.
+        self.scopes: list[tuple[list[Token], PythonFunction]] = []
+        self.names: dict[Token, str] = {}
+        self.function: PythonFunction | None = None
+        self.indent = 0
+        self.counter = 0
+
+    def transpile(self, statements: list[Stmt]) -> str:
+        analyzer = CaptureAnalyzer()
+        analyzer.analyze(statements)
+        self.boxed = analyzer.boxed()
+        self.free = analyzer.free
+
+        self.function = PythonFunction(None)
+        self.indent = 1
+        self.block(statements)
+        return "\n".join(["def _main():"] + self.body(self.function))
+
+    def body(self, function: PythonFunction) -> list[str]:
+        lines = function.lines or ["    " * self.indent + "pass"]
+        if function.nonlocals:
+            lines.insert(0, "    " * self.indent +
+                         "nonlocal " + ", ".join(sorted(function.nonlocals)))
+        return lines
+
+    def unique(self, prefix: str) -> str:
+        self.counter += 1
+        return f"{prefix}{self.counter}"
+
+    def constant(self, value: object) -> str:
+        name = self.unique("_k")
+        self.constants[name] = value
+        return name
+
+    def emit(self, line: str):
+        self.function.lines.append("    " * self.indent + line)
+
+    def block(self, statements: list[Stmt]):
+        for statement in statements:
+            statement.accept(self)
+
+    def nested(self, stmt: Stmt):
+        self.indent += 1
+        before = len(self.function.lines)
+        stmt.accept(self)
+        if len(self.function.lines) == before:
+            self.emit("pass")
+        self.indent -= 1
+
+    def expression(self, expr: Expr) -> str:
+        return expr.accept(self)
+
+    def condition(self, expr: Expr) -> str:
+        if self.is_boolean(expr):
+            return self.expression(expr)
+        value = self.unique("_t")
+        return f"(({value} := {self.expression(expr)}) is not None and {value} is not False)"
+
+    def is_boolean(self, expr: Expr) -> bool:
+        if isinstance(expr, Grouping):
+            return self.is_boolean(expr.expression)
+        if isinstance(expr, Unary):
+            return expr.operator.token_type == TokenType.BANG
+        if isinstance(expr, Binary):
+            return expr.operator.token_type in self.COMPARISONS
+        return False
+
+    def declare(self, name: Token) -> str | None:
+        if not self.scopes:
+            return None
+        self.scopes[-1][0].append(name)
+        python_name = self.names[name] = f"{name.lexeme}_{self.unique('')}"
+        return python_name
+
+    def local(self, expr: Variable | Assign) -> Token:
+        declarations, owner = self.scopes[-1 - expr.depth]
+        declaration = declarations[expr.slot]
+        if owner is not self.function and declaration not in self.boxed and isinstance(expr, Assign):
+            self.function.nonlocals.add(self.names[declaration])
+        return declaration
+
+    def visit_stmt_expression(self, stmt: Expression):
+        self.emit(self.expression(stmt.expression))
+
+    def visit_stmt_print(self, stmt: Print):
+        self.emit(f"_print(_stringify({self.expression(stmt.expression)}))")
+
+    def visit_stmt_var(self, stmt: Var):
+        value = "None"
+        if stmt.initializer is not None:
+            value = self.expression(stmt.initializer)
+
+        name = self.declare(stmt.name)
+        if name is None:
+            self.emit(f"_globals[{stmt.name.lexeme!r}] = {value}")
+        elif stmt.name in self.boxed:
+            self.emit(f"{name} = [{value}]")
+        else:
+            self.emit(f"{name} = {value}")
+
+    def visit_stmt_block(self, stmt: Block):
+        if stmt.bare:
+            self.block(stmt.statements)
+            return
+        self.scopes.append(([], self.function))
+        self.block(stmt.statements)
+        self.scopes.pop()
+
+    def visit_stmt_if(self, stmt: If):
+        self.emit(f"if {self.condition(stmt.condition)}:")
+        self.nested(stmt.then_branch)
+        if stmt.else_branch is not None:
+            self.emit("else:")
+            self.nested(stmt.else_branch)
+
+    def visit_stmt_while(self, stmt: While):
+        self.emit(f"while {self.condition(stmt.condition)}:")
+        self.nested(stmt.body)
+
+    def visit_stmt_function(self, stmt: Function):
+        name = self.declare(stmt.name)
+        boxed = stmt.name in self.boxed
+        if boxed:
+            # The function can refer to itself, so its box must exist before
+            # the def binds it.
+            self.emit(f"{name} = [None]")
+
+        function = self.unique("_f")
+        enclosing = self.function
+        self.function = PythonFunction(enclosing)
+        self.scopes.append(([], self.function))
+
+        parameters = [self.declare(param) for param in stmt.params]
+        parameters += [f"{self.names[captured]}={self.names[captured]}"
+                       for captured in self.free[stmt.name] if captured in self.boxed]
+
+        self.indent += 1
+        self.block(stmt.body)
+        lines = self.body(self.function)
+        self.indent -= 1
+
+        self.scopes.pop()
+        self.function = enclosing
+
+        self.emit(f"def {function}({', '.join(parameters)}):")
+        self.function.lines.extend(lines)
+
+        value = f"_Function({function}, {stmt.name.lexeme!r}, {len(stmt.params)})"
+        if name is None:
+            self.emit(f"_globals[{stmt.name.lexeme!r}] = {value}")
+        elif boxed:
+            self.emit(f"{name}[0] = {value}")
+        else:
+            self.emit(f"{name} = {value}")
+
+    def visit_stmt_return(self, stmt: Return):
+        if stmt.value is None:
+            self.emit("return None")
+        else:
+            self.emit(f"return {self.expression(stmt.value)}")
+
+    def visit_expr_literal(self, expr: Literal):
+        if type(expr.value) is float and not math.isfinite(expr.value):
+            return self.constant(expr.value)
+        return repr(expr.value)
+
+    def visit_expr_grouping(self, expr: Grouping):
+        return self.expression(expr.expression)
+
+    def visit_expr_variable(self, expr: Variable):
+        if expr.depth is None:
+            return f"_globals[{self.constant(GlobalName(expr.name))}]"
+
+        declaration = self.local(expr)
+        if declaration in self.boxed:
+            return f"{self.names[declaration]}[0]"
+        return self.names[declaration]
+
+    def visit_expr_assign(self, expr: Assign):
+        value = self.expression(expr.value)
+        if expr.depth is None:
+            return f"_assign_global({self.constant(expr.name)}, {value})"
+
+        declaration = self.local(expr)
+        if declaration in self.boxed:
+            return f"_assign_box({self.names[declaration]}, {value})"
+        return f"({self.names[declaration]} := {value})"
+
+    def visit_expr_logical(self, expr: Logical):
+        left = self.unique("_t")
+        right = self.expression(expr.right)
+        if expr.operator.token_type == TokenType.OR:
+            return f"({left} if (({left} := {self.expression(expr.left)}) is not None and {left} is not False) else {right})"
+        return f"({left} if (({left} := {self.expression(expr.left)}) is None or {left} is False) else {right})"
+
+    def visit_expr_unary(self, expr: Unary):
+        value = self.unique("_t")
+        right = self.expression(expr.right)
+        if expr.operator.token_type == TokenType.BANG:
+            return f"(({value} := {right}) is None or {value} is False)"
+        operator = self.constant(expr.operator)
+        return f"(-{value} if type({value} := {right}) is float else _operand_error({operator}))"
+
+    def visit_expr_binary(self, expr: Binary):
+        token_type = expr.operator.token_type
+        left = self.expression(expr.left)
+        right = self.expression(expr.right)
+
+        if token_type == TokenType.EQUAL_EQUAL:
+            return f"({left} == {right})"
+        if token_type == TokenType.BANG_EQUAL:
+            return f"({left} != {right})"
+
+        a = self.unique("_t")
+        operator = self.constant(expr.operator)
+        if token_type == TokenType.PLUS:
+            if isinstance(expr.right, Literal) and type(expr.right.value) in (float, str):
+                kind = type(expr.right.value).__name__
+                return f"({a} + {right} if type({a} := {left}) is {kind} else _add_error({operator}))"
+            b = self.unique("_t")
+            return (f"({a} + {b} if type({a} := {left}) is type({b} := {right}) in _ADDABLE"
+                    f" else _add_error({operator}))")
+
+        symbol = self.NUMBER_OPERATORS[token_type]
+        # Both operands are evaluated before any type check, as the
+        # tree-walker does, unless the right one is a number literal.
+        if isinstance(expr.right, Literal) and type(expr.right.value) is float:
+            return f"({a} {symbol} {right} if type({a} := {left}) is float else _operands_error({operator}))"
+        b = self.unique("_t")
+        return (f"({a} {symbol} {b} if type({a} := {left}) is type({b} := {right}) is float"
+                f" else _operands_error({operator}))")
+
+    def visit_expr_call(self, expr: Call):
+        arguments = [self.expression(expr.callee), self.constant(expr.paren)]
+        arguments += [self.expression(argument)
+                      for argument in expr.arguments]
+        return f"_call({', '.join(arguments)})"
+
+
+# The key used for a global read. A missing global raises KeyError with this
+# key, which still knows the Token to report.
+class GlobalName(str):
+    __slots__ = ("token",)
+
+    def __new__(cls, token: Token):
+        name = super().__new__(cls, token.lexeme)
+        name.token = token
+        return name
+
+
+class TranspiledFunction(LoxCallable):
+    __slots__ = ("function", "name", "parameters")
+
+    def __init__(self, function, name: str, parameters: int):
+        self.function = function
+        self.name = name
+        self.parameters = parameters
+
+    def call(self, interpreter, arguments):
+        return self.function(*arguments)
+
+    def arity(self):
+        return self.parameters
+
+    def __str__(self):
+        return f"<fn {self.name}>"
+
+
+class PythonBackend:
+
+    def __init__(self, interpreter):
+        self.interpreter = interpreter
+
+    def interpret(self, statements: list[Stmt]):
+        transpiler = Transpiler()
+        try:
+            source = transpiler.transpile(statements)
+            code = compile(source, "<lox>", "exec")
+        except (SyntaxError, RecursionError, MemoryError):
+            # Beyond CPython's nesting limits; the tree-walker still copes.
+            self.interpreter.interpret(statements)
+            return
+
+        namespace = self.runtime()
+        namespace.update(transpiler.constants)
+        exec(code, namespace)
+
+        try:
+            namespace["_main"]()
+        except LoxRuntimeError as error:
+            self.interpreter.reporter.runtime_error(error)
+        except KeyError as error:
+            if not error.args or not isinstance(error.args[0], GlobalName):
+                raise
+            token = error.args[0].token
+            self.interpreter.reporter.runtime_error(LoxRuntimeError(
+                token, f"Undefined variable '{token.lexeme}'."))
+
+    def runtime(self) -> dict[str, object]:
+        interpreter = self.interpreter
+        lox_globals = interpreter.lox_globals.values
+
+        def call(callee, paren: Token, *arguments):
+            try:
+                if type(callee) is TranspiledFunction:
+                    if len(arguments) == callee.parameters:
+                        return callee.function(*arguments)
+                    raise LoxRuntimeError(
+                        paren, f"Expected {callee.parameters} arguments but got {len(arguments)}.")
+
+                if not isinstance(callee, LoxCallable):
+                    raise LoxRuntimeError(
+                        paren, "Can only call functions and classes.")
+
+                if len(arguments) != callee.arity():
+                    raise LoxRuntimeError(
+                        paren, f"Expected {callee.arity()} arguments but got {len(arguments)}.")
+                return callee.call(interpreter, list(arguments))
+            except RecursionError:
+                raise LoxRuntimeError(paren, "Stack overflow.") from None
+            except NativeError as error:
+                raise LoxRuntimeError(paren, error.message) from None
+
+        def assign_global(name: Token, value: object):
+            if name.lexeme not in lox_globals:
+                raise LoxRuntimeError(
+                    name, f"Undefined variable '{name.lexeme}'.")
+            lox_globals[name.lexeme] = value
+            return value
+
+        def assign_box(box: list, value: object):
+            box[0] = value
+            return value
+
+        def operand_error(operator: Token):
+            raise LoxRuntimeError(operator, "Operand must be a number.")
+
+        def operands_error(operator: Token):
+            raise LoxRuntimeError(operator, "Operands must be numbers.")
+
+        def add_error(operator: Token):
+            raise LoxRuntimeError(
+                operator, "Operands must be two numbers or two strings.")
+
+        return {
+            "__builtins__": {"type": type, "float": float, "str": str},
+            "_ADDABLE": (float, str),
+            "_Function": TranspiledFunction,
+            "_globals": lox_globals,
+            "_print": interpreter.output.print,
+            "_stringify": interpreter.stringify,
+            "_call": call,
+            "_assign_global": assign_global,
+            "_assign_box": assign_box,
+            "_operand_error": operand_error,
+            "_operands_error": operands_error,
+            "_add_error": add_error,
+        }
@@ -0,0 +1,333 @@
+from lox.chunk import Chunk, OpCode
+from lox.compiler import Compiler
+from lox.error import LoxRuntimeError, NativeError
+from lox.lox_callable import LoxCallable
+from lox.stmt import Stmt
+from lox.token import Token, TokenType
+from lox.vm_function import VMFunction, VMClosure, Upvalue
+
+FRAMES_MAX = 4096
+
+OP_CONSTANT = OpCode.CONSTANT.value
+OP_NIL = OpCode.NIL.value
+OP_TRUE = OpCode.TRUE.value
+OP_FALSE = OpCode.FALSE.value
+OP_POP = OpCode.POP.value
+OP_GET_LOCAL = OpCode.GET_LOCAL.value
+OP_SET_LOCAL = OpCode.SET_LOCAL.value
+OP_STORE_LOCAL = OpCode.STORE_LOCAL.value
+OP_GET_GLOBAL = OpCode.GET_GLOBAL.value
+OP_DEFINE_GLOBAL = OpCode.DEFINE_GLOBAL.value
+OP_SET_GLOBAL = OpCode.SET_GLOBAL.value
+OP_STORE_GLOBAL = OpCode.STORE_GLOBAL.value
+OP_GET_UPVALUE = OpCode.GET_UPVALUE.value
+OP_SET_UPVALUE = OpCode.SET_UPVALUE.value
+OP_STORE_UPVALUE = OpCode.STORE_UPVALUE.value
+OP_EQUAL = OpCode.EQUAL.value
+OP_NOT_EQUAL = OpCode.NOT_EQUAL.value
+OP_GREATER = OpCode.GREATER.value
+OP_GREATER_EQUAL = OpCode.GREATER_EQUAL.value
+OP_LESS = OpCode.LESS.value
+OP_LESS_EQUAL = OpCode.LESS_EQUAL.value
+OP_ADD = OpCode.ADD.value
+OP_SUBTRACT = OpCode.SUBTRACT.value
+OP_MULTIPLY = OpCode.MULTIPLY.value
+OP_DIVIDE = OpCode.DIVIDE.value
+OP_NOT = OpCode.NOT.value
+OP_NEGATE = OpCode.NEGATE.value
+OP_PRINT = OpCode.PRINT.value
+OP_JUMP = OpCode.JUMP.value
+OP_JUMP_IF_FALSE = OpCode.JUMP_IF_FALSE.value
+OP_POP_JUMP_IF_FALSE = OpCode.POP_JUMP_IF_FALSE.value
+OP_LOOP = OpCode.LOOP.value
+OP_CALL = OpCode.CALL.value
+OP_CLOSURE = OpCode.CLOSURE.value
+OP_CLOSE_UPVALUE = OpCode.CLOSE_UPVALUE.value
+OP_RETURN = OpCode.RETURN.value
+
+
+class VM:
+    def __init__(self, interpreter, max_frames: int = FRAMES_MAX):
+        self.interpreter = interpreter
+        # Lox calls never recurse in Python, so this is the only bound on how
+        # deep a script can go.
+        self.max_frames = max_frames
+        self.globals: dict[str, object] = interpreter.lox_globals.values
+        self.stack: list[object] = []
+        self.open_upvalues: dict[int, Upvalue] = {}
+        # Suspended callers of every run() on the Python stack. A native that
+        # calls back into Lox code starts a nested run() on top of them.
+        self.frames: list[tuple[VMClosure, int, int]] = []
+        self.activations = 0
+
+    def interpret(self, statements: list[Stmt]):
+        reporter = self.interpreter.reporter
+        function: VMFunction = Compiler(reporter).compile(statements)
+        if reporter.has_error:
+            return
+
+        try:
+            self.call(VMClosure(function, [], self), [])
+        except LoxRuntimeError as error:
+            self.reset_stack()
+            reporter.runtime_error(error)
+
+    def reset_stack(self):
+        self.stack.clear()
+        self.open_upvalues.clear()
+        self.frames.clear()
+        self.activations = 0
+
+    def call(self, closure: VMClosure, arguments: list[object]):
+        base = len(self.stack)
+        self.stack.append(closure)
+        self.stack.extend(arguments)
+        return self.run(closure, base)
+
+    def capture_upvalue(self, index: int) -> Upvalue:
+        upvalue = self.open_upvalues.get(index)
+        if upvalue is None:
+            upvalue = self.open_upvalues[index] = Upvalue(index)
+        return upvalue
+
+    def close_upvalues(self, last: int):
+        for index in [index for index in self.open_upvalues if index >= last]:
+            upvalue = self.open_upvalues.pop(index)
+            upvalue.value = self.stack[index]
+            upvalue.closed = True
+
+    def error(self, chunk: Chunk, ip: int, message: str):
+        # Operand bytes carry the line of their instruction, so any byte read
+        # so far points at the right line.
+        line = chunk.lines[ip - 1]
+        return LoxRuntimeError(Token(TokenType.EOF, "", None, line), message)
+
+    def run(self, closure: VMClosure, base: int):
+        stack = self.stack
+        globals = self.globals
+        open_upvalues = self.open_upvalues
+        stringify = self.interpreter.stringify
+        write = self.interpreter.output.print
+        frames = self.frames
+        entry = len(frames)
+        max_frames = self.max_frames
+
+        chunk = closure.function.chunk
+        code = chunk.code
+        constants = chunk.constants
+        ip = 0
+
+        self.activations += 1
+        try:
+            while True:
+                op = code[ip]
+                ip += 1
+
+                # Instructions are tested in order of how often they ran in
+                # the programs of tool/benchmark.py, most frequent first.
+                if op == OP_CONSTANT:
+                    stack.append(constants[(code[ip] << 8) | code[ip + 1]])
+                    ip += 2
+                elif op == OP_GET_LOCAL:
+                    stack.append(stack[base + code[ip]])
+                    ip += 1
+                elif op == OP_ADD:
+                    b = stack.pop()
+                    a = stack[-1]
+                    kind = type(a)
+                    if kind is type(b) and (kind is float or kind is str):
+                        stack[-1] = a + b
+                    else:
+                        raise self.error(chunk, ip, "Operands must be two numbers or two strings.")
+                elif op == OP_GET_GLOBAL:
+                    name = constants[(code[ip] << 8) | code[ip + 1]]
+                    ip += 2
+                    try:
+                        stack.append(globals[name])
+                    except KeyError:
+                        raise self.error(chunk, ip, f"Undefined variable '{name}'.") from None
+                elif op == OP_LESS:
+                    b = stack.pop()
+                    a = stack[-1]
+                    if type(a) is float and type(b) is float:
+                        stack[-1] = a < b
+                    else:
+                        raise self.error(chunk, ip, "Operands must be numbers.")
+                elif op == OP_POP_JUMP_IF_FALSE:
+                    value = stack.pop()
+                    if value is None or value is False:
+                        ip += 2 + ((code[ip] << 8) | code[ip + 1])
+                    else:
+                        ip += 2
+                elif op == OP_STORE_GLOBAL:
+                    name = constants[(code[ip] << 8) | code[ip + 1]]
+                    ip += 2
+                    if name not in globals:
+                        raise self.error(chunk, ip, f"Undefined variable '{name}'.")
+                    globals[name] = stack.pop()
+                elif op == OP_LOOP:
+                    ip += 2 - ((code[ip] << 8) | code[ip + 1])
+                elif op == OP_STORE_LOCAL:
+                    stack[base + code[ip]] = stack.pop()
+                    ip += 1
+                elif op == OP_MULTIPLY:
+                    b = stack.pop()
+                    a = stack[-1]
+                    if type(a) is float and type(b) is float:
+                        stack[-1] = a * b
+                    else:
+                        raise self.error(chunk, ip, "Operands must be numbers.")
+                elif op == OP_CALL:
+                    argc = code[ip]
+                    ip += 1
+                    callee = stack[-1 - argc]
+                    if type(callee) is VMClosure:
+                        if argc != callee.function.arity:
+                            raise self.error(
+                                chunk, ip, f"Expected {callee.function.arity} arguments but got {argc}.")
+                        if len(frames) + self.activations >= max_frames:
+                            raise self.error(chunk, ip, "Stack overflow.")
+                        frames.append((closure, ip, base))
+                        closure = callee
+                        chunk = closure.function.chunk
+                        code = chunk.code
+                        constants = chunk.constants
+                        ip = 0
+                        base = len(stack) - argc - 1
+                    elif isinstance(callee, LoxCallable):
+                        if argc != callee.arity():
+                            raise self.error(
+                                chunk, ip, f"Expected {callee.arity()} arguments but got {argc}.")
+                        arguments = stack[len(stack) - argc:]
+                        del stack[len(stack) - argc - 1:]
+                        try:
+                            stack.append(callee.call(self.interpreter, arguments))
+                        except NativeError as error:
+                            raise self.error(chunk, ip, error.message) from None
+                    else:
+                        raise self.error(chunk, ip, "Can only call functions and classes.")
+                elif op == OP_RETURN:
+                    result = stack.pop()
+                    if open_upvalues:
+                        self.close_upvalues(base)
+                    del stack[base:]
+                    if len(frames) == entry:
+                        return result
+                    closure, ip, base = frames.pop()
+                    chunk = closure.function.chunk
+                    code = chunk.code
+                    constants = chunk.constants
+                    stack.append(result)
+                elif op == OP_GET_UPVALUE:
+                    upvalue = closure.upvalues[code[ip]]
+                    ip += 1
+                    stack.append(upvalue.value if upvalue.closed else stack[upvalue.index])
+                elif op == OP_POP:
+                    stack.pop()
+                elif op == OP_SUBTRACT:
+                    b = stack.pop()
+                    a = stack[-1]
+                    if type(a) is float and type(b) is float:
+                        stack[-1] = a - b
+                    else:
+                        raise self.error(chunk, ip, "Operands must be numbers.")
+                elif op == OP_STORE_UPVALUE:
+                    upvalue = closure.upvalues[code[ip]]
+                    ip += 1
+                    if upvalue.closed:
+                        upvalue.value = stack.pop()
+                    else:
+                        stack[upvalue.index] = stack.pop()
+                elif op == OP_SET_LOCAL:
+                    stack[base + code[ip]] = stack[-1]
+                    ip += 1
+                elif op == OP_JUMP:
+                    ip += 2 + ((code[ip] << 8) | code[ip + 1])
+                elif op == OP_JUMP_IF_FALSE:
+                    value = stack[-1]
+                    if value is None or value is False:
+                        ip += 2 + ((code[ip] << 8) | code[ip + 1])
+                    else:
+                        ip += 2
+                elif op == OP_GREATER:
+                    b = stack.pop()
+                    a = stack[-1]
+                    if type(a) is float and type(b) is float:
+                        stack[-1] = a > b
+                    else:
+                        raise self.error(chunk, ip, "Operands must be numbers.")
+                elif op == OP_LESS_EQUAL:
+                    b = stack.pop()
+                    a = stack[-1]
+                    if type(a) is float and type(b) is float:
+                        stack[-1] = a <= b
+                    else:
+                        raise self.error(chunk, ip, "Operands must be numbers.")
+                elif op == OP_GREATER_EQUAL:
+                    b = stack.pop()
+                    a = stack[-1]
+                    if type(a) is float and type(b) is float:
+                        stack[-1] = a >= b
+                    else:
+                        raise self.error(chunk, ip, "Operands must be numbers.")
+                elif op == OP_EQUAL:
+                    b = stack.pop()
+                    stack[-1] = stack[-1] == b
+                elif op == OP_NOT_EQUAL:
+                    b = stack.pop()
+                    stack[-1] = stack[-1] != b
+                elif op == OP_DIVIDE:
+                    b = stack.pop()
+                    a = stack[-1]
+                    if type(a) is float and type(b) is float:
+                        stack[-1] = a / b
+                    else:
+                        raise self.error(chunk, ip, "Operands must be numbers.")
+                elif op == OP_NOT:
+                    value = stack[-1]
+                    stack[-1] = value is None or value is False
+                elif op == OP_NEGATE:
+                    value = stack[-1]
+                    if type(value) is not float:
+                        raise self.error(chunk, ip, "Operand must be a number.")
+                    stack[-1] = -value
+                elif op == OP_NIL:
+                    stack.append(None)
+                elif op == OP_TRUE:
+                    stack.append(True)
+                elif op == OP_FALSE:
+                    stack.append(False)
+                elif op == OP_SET_GLOBAL:
+                    name = constants[(code[ip] << 8) | code[ip + 1]]
+                    ip += 2
+                    if name not in globals:
+                        raise self.error(chunk, ip, f"Undefined variable '{name}'.")
+                    globals[name] = stack[-1]
+                elif op == OP_SET_UPVALUE:
+                    upvalue = closure.upvalues[code[ip]]
+                    ip += 1
+                    if upvalue.closed:
+                        upvalue.value = stack[-1]
+                    else:
+                        stack[upvalue.index] = stack[-1]
+                elif op == OP_DEFINE_GLOBAL:
+                    globals[constants[(code[ip] << 8) | code[ip + 1]]] = stack.pop()
+                    ip += 2
+                elif op == OP_PRINT:
+                    write(stringify(stack.pop()))
+                elif op == OP_CLOSURE:
+                    function: VMFunction = constants[(code[ip] << 8) | code[ip + 1]]
+                    ip += 2
+                    upvalues = []
+                    for _ in range(function.upvalue_count):
+                        if code[ip]:
+                            upvalues.append(self.capture_upvalue(base + code[ip + 1]))
+                        else:
+                            upvalues.append(closure.upvalues[code[ip + 1]])
+                        ip += 2
+                    stack.append(VMClosure(function, upvalues, self))
+                elif op == OP_CLOSE_UPVALUE:
+                    self.close_upvalues(len(stack) - 1)
+                    stack.pop()
+        finally:
+            self.activations -= 1
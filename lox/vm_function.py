@@ -0,0 +1,42 @@
+from lox.chunk import Chunk
+from lox.lox_callable import LoxCallable
+
+
+class VMFunction:
+    def __init__(self, name: str, arity: int):
+        self.name = name
+        self.arity = arity
+        self.upvalue_count = 0
+        self.chunk = Chunk()
+
+    def __str__(self):
+        return f"<fn {self.name}>"
+
+
+# A variable captured by a closure. It points at its stack slot while the
+# variable is still on the stack and holds the value itself once closed.
+class Upvalue:
+    __slots__ = ("index", "value", "closed")
+
+    def __init__(self, index: int):
+        self.index = index
+        self.value = None
+        self.closed = False
+
+
+class VMClosure(LoxCallable):
+    __slots__ = ("function", "upvalues", "vm")
+
+    def __init__(self, function: VMFunction, upvalues: list[Upvalue], vm):
+        self.function = function
+        self.upvalues = upvalues
+        self.vm = vm
+
+    def call(self, interpreter, arguments):
+        return self.vm.call(self, arguments)
+
+    def arity(self):
+        return self.function.arity
+
+    def __str__(self):
+        return str(self.function)
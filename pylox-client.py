@@ -0,0 +1,4 @@
+from app.client import client
+
+if __name__ == "__main__":
+    client()
@@ -0,0 +1,34 @@
+import gc
+import os
+import tempfile
+import unittest
+from lox.ast_cache import AstCache
+from lox.expr import Literal
+from lox.stmt import Print
+
+
+class GcStateTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = AstCache(os.path.join(self.directory.name, "script.lox"),
+                              self.directory.name)
+        self.statements = [Print(Literal(1.0))]
+        self.cache.store("print 1;", self.statements)
+        self.addCleanup(self.directory.cleanup)
+        self.addCleanup(gc.enable)
+
+    def test_load_leaves_collector_on(self):
+        gc.enable()
+        self.assertEqual(self.cache.load("print 1;"), self.statements)
+        self.assertTrue(gc.isenabled())
+
+    def test_load_leaves_collector_off(self):
+        gc.disable()
+        self.assertEqual(self.cache.load("print 1;"), self.statements)
+        self.assertIsNone(self.cache.load("print 2;"))
+        self.assertFalse(gc.isenabled())
+
+
+if __name__ == "__main__":
+    unittest.main()
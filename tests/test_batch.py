@@ -0,0 +1,45 @@
+import os
+import signal
+import tempfile
+import time
+import unittest
+from app.batch import run_batch
+from lox.natives import native, MODULES
+
+
+def hang():
+    # Like a native busy in C code, which the alarm cannot interrupt.
+    signal.pthread_sigmask(signal.SIG_BLOCK, {signal.SIGALRM})
+    time.sleep(60)
+
+
+class TimeoutTest(unittest.TestCase):
+
+    def setUp(self):
+        native("test_batch")(hang)
+
+    def tearDown(self):
+        del MODULES["test_batch"]
+
+    def test_stuck_native_is_killed(self):
+        with tempfile.TemporaryDirectory() as directory:
+            for name, code in [("a_stuck.lox", "print 1; hang();"),
+                               ("b_loop.lox", "while (true) {}"),
+                               ("c_fine.lox", "print 2;")]:
+                with open(os.path.join(directory, name), "w") as file:
+                    file.write(code)
+
+            start = time.perf_counter()
+            report = run_batch(directory, "tree", {"cache": False}, jobs=1, timeout=0.5)
+            self.assertLess(time.perf_counter() - start, 10)
+
+        stuck, loop, fine = report["scripts"]
+        self.assertTrue(stuck["timed_out"])
+        self.assertIsNone(stuck["status"])
+        self.assertTrue(loop["timed_out"])
+        self.assertEqual(fine["stdout"], "2\n")
+        self.assertEqual(report["summary"]["timed_out"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,39 @@
+import os
+import sys
+import tempfile
+import unittest
+from io import StringIO
+from socket import socket, AF_UNIX
+from unittest import mock
+from app.client import client
+from app.protocol import default_socket
+
+
+class SocketOwnerTest(unittest.TestCase):
+
+    def test_default_socket_is_per_user(self):
+        with mock.patch.dict(os.environ, {"XDG_RUNTIME_DIR": "/run/user/1000"}):
+            self.assertEqual(default_socket(), "/run/user/1000/pylox.sock")
+        with mock.patch.dict(os.environ, {"XDG_RUNTIME_DIR": "", "TMPDIR": "/tmp"}):
+            self.assertEqual(default_socket(), f"/tmp/pylox-{os.getuid()}/pylox.sock")
+
+    def test_refuses_socket_of_another_user(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "pylox.sock")
+            listener = socket(AF_UNIX)
+            listener.bind(path)
+            listener.listen()
+            self.addCleanup(listener.close)
+            errors = StringIO()
+            argv = ["pylox-client.py", "run", "missing.lox", f"--socket={path}"]
+            with mock.patch.object(sys, "argv", argv), \
+                    mock.patch.object(sys, "stderr", errors), \
+                    mock.patch("os.getuid", return_value=os.getuid() + 1):
+                with self.assertRaises(SystemExit) as stop:
+                    client()
+            self.assertEqual(stop.exception.code, 1)
+            self.assertIn("belongs to another user", errors.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
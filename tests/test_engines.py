@@ -0,0 +1,165 @@
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from lox.lox import Lox
+
+ROOT = Path(__file__).resolve().parent.parent
+EXAMPLES = sorted((ROOT / "examples").glob("*.lox"))
+
+# Programs run by every engine, with the exit status each must give.
+PROGRAMS = {
+    "arithmetic": ("""
+print 1 + 2 * 3 - 4 / 8;
+print -(3 - 5) >= 2 == true;
+print "con" + "cat";
+print 0.1 + 0.2;
+print -0;
+print nil == false;
+print !nil and "yes" or "no";
+""", 0),
+    "scopes_and_closures": ("""
+var a = "global";
+{
+  fun show() { print a; }
+  show();
+  var a = "block";
+  show();
+  print a;
+}
+fun counter() {
+  var n = 0;
+  fun next() { n = n + 1; return n; }
+  return next;
+}
+var c = counter();
+c(); c();
+print c();
+var fs = list();
+for (var i = 0; i < 3; i = i + 1) {
+  var j = i * 10;
+  fun get() { return j; }
+  push(fs, get);
+}
+print get(fs, 0)() + get(fs, 2)();
+""", 0),
+    "control_flow": ("""
+var total = 0;
+for (var i = 0; i < 10; i = i + 1) {
+  if (i == 3) total = total + 100; else if (i > 7) total = total - 1;
+  else total = total + i;
+}
+print total;
+var k = 3;
+while (k > 0) k = k - 1;
+print k;
+fun fib(n) { if (n < 2) return n; return fib(n - 1) + fib(n - 2); }
+print fib(15);
+""", 0),
+    "natives": ("""
+var l = list();
+push(l, 3); push(l, 1); push(l, 2);
+sort(l);
+print l;
+print join(map(l, str), "-");
+print sum(l);
+print round(2.5);
+print fixed(2.5, 0);
+print substr("hello", 1, 3);
+print clock() > 0;
+""", 0),
+    "scan_error": ("""
+print "ok";
+var x = @;
+""", 65),
+    "parse_error": ("""
+print 1;
+print (1 + ;
+""", 65),
+    "resolve_errors": ("""
+return 1;
+{ var a = 1; var a = 2; }
+{ var b = b; }
+""", 65),
+    "unterminated_string": ("""
+print "never closed;
+""", 65),
+    "add_mismatch": ("""
+print "before";
+print 1 + "a";
+print "after";
+""", 70),
+    "negate_string": ("""
+print -"a";
+""", 70),
+    "compare_mismatch": ("""
+print 1 < "2";
+""", 70),
+    "undefined_variable": ("""
+print missing;
+""", 70),
+    "undefined_assignment": ("""
+fun f() { missing = 1; }
+f();
+""", 70),
+    "call_number": ("""
+var x = 1;
+x();
+""", 70),
+    "wrong_arity": ("""
+fun f(a, b) { return a; }
+print f(1);
+""", 70),
+    "error_in_function": ("""
+fun inner(x) {
+  return x * nil;
+}
+fun outer() { return inner(2); }
+print "start";
+outer();
+""", 70),
+    "native_error": ("""
+print sqrt(-1);
+""", 70),
+}
+
+
+def run_cli(path: Path, engine: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, "-m", "app.cli", "run", str(path), f"--engine={engine}", "--no-cache"],
+        cwd=ROOT, capture_output=True, text=True, timeout=60)
+
+
+# Runs the same programs through the command line on every engine, and
+# compares each engine's stdout, stderr and exit status with the tree-walker's.
+class EngineParityTest(unittest.TestCase):
+
+    def assert_same_on_every_engine(self, path: Path, status: int | None = None):
+        expected = run_cli(path, "tree")
+        if status is not None:
+            self.assertEqual(expected.returncode, status, expected.stderr)
+        for engine in Lox.engines:
+            if engine == "tree":
+                continue
+            with self.subTest(program=path.stem, engine=engine):
+                result = run_cli(path, engine)
+                self.assertEqual(result.stdout, expected.stdout)
+                self.assertEqual(result.stderr, expected.stderr)
+                self.assertEqual(result.returncode, expected.returncode)
+
+    def test_examples(self):
+        self.assertTrue(EXAMPLES)
+        for path in EXAMPLES:
+            self.assert_same_on_every_engine(path, 0)
+
+    def test_programs(self):
+        with tempfile.TemporaryDirectory() as directory:
+            for name, (code, status) in PROGRAMS.items():
+                path = Path(directory) / f"{name}.lox"
+                path.write_text(code, encoding="utf-8")
+                self.assert_same_on_every_engine(path, status)
+
+
+if __name__ == "__main__":
+    unittest.main()
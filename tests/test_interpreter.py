@@ -0,0 +1,135 @@
+import unittest
+from unittest import mock
+from lox.environment import Environment
+from lox.lox import Lox
+from tests.test_parser import run
+
+
+class ListPrintingTest(unittest.TestCase):
+
+    def test_nested_lists(self):
+        code = """
+            var a = list();
+            push(a, 1); push(a, list()); push(a, "x");
+            push(get(a, 1), nil); push(get(a, 1), list());
+            print a;
+            print str(a);
+            print join(a, "; ");
+        """
+        for engine in Lox.engines:
+            lox, output, errors = run(code, engine)
+            self.assertEqual(errors.getvalue(), "", engine)
+            self.assertEqual(output.lines, [
+                "[1, [nil, []], x]",
+                "[1, [nil, []], x]",
+                "1; [nil, []]; x",
+            ], engine)
+
+    def test_deeply_nested_list(self):
+        code = """
+            var a = list();
+            for (var i = 0; i < 5000; i = i + 1) {
+                var b = list();
+                push(b, a);
+                a = b;
+            }
+            var text = str(a);
+            print len(text);
+            print substr(text, 0, 3);
+            print join(a, "") == substr(text, 1, len(text) - 2);
+        """
+        for engine in Lox.engines:
+            lox, output, errors = run(code, engine)
+            self.assertEqual(errors.getvalue(), "", engine)
+            self.assertEqual(output.lines, ["10002", "[[[", "true"], engine)
+
+    def test_cyclic_lists(self):
+        code = """
+            var a = list();
+            var b = list();
+            push(a, 1); push(a, b); push(a, a);
+            push(b, a); push(b, b);
+            print a;
+            print b;
+            print join(a, " ");
+        """
+        for engine in Lox.engines:
+            lox, output, errors = run(code, engine)
+            self.assertEqual(errors.getvalue(), "", engine)
+            self.assertEqual(output.lines, [
+                "[1, [[...], [...]], [...]]",
+                "[[1, [...], [...]], [...]]",
+                "1 [[1, [...], [...]], [...]] [1, [[...], [...]], [...]]",
+            ], engine)
+
+
+class LoopEnvironmentTest(unittest.TestCase):
+
+    def count_environments(self, code: str, engine: str) -> tuple[int, list[str]]:
+        created = []
+        init = Environment.__init__
+
+        def counting_init(environment, *args, **kwargs):
+            created.append(environment)
+            init(environment, *args, **kwargs)
+
+        with mock.patch.object(Environment, "__init__", counting_init):
+            lox, output, errors = run(code, engine)
+        self.assertEqual(errors.getvalue(), "", engine)
+        return len(created), output.lines
+
+    def test_for_body_environment_is_reused(self):
+        code = """
+            var total = 0;
+            for (var i = 0; i < 1000; i = i + 1) {
+                var square = i * i;
+                total = total + square;
+            }
+            print total;
+        """
+        for engine in ("tree", "closure"):
+            environments, lines = self.count_environments(code, engine)
+            self.assertEqual(lines, ["332833500"], engine)
+            self.assertLess(environments, 10, engine)
+
+    def test_for_body_with_closure_gets_fresh_environments(self):
+        code = """
+            var a; var b;
+            for (var i = 0; i < 2; i = i + 1) {
+                var j = i;
+                fun f() { return j; }
+                if (i == 0) a = f; else b = f;
+            }
+            print a();
+            print b();
+        """
+        for engine in ("tree", "closure"):
+            lines = self.count_environments(code, engine)[1]
+            self.assertEqual(lines, ["0", "1"], engine)
+
+
+class RecursionTest(unittest.TestCase):
+
+    def test_tree_walker_eliminates_tail_calls(self):
+        code = """
+            fun even(n) { if (n == 0) return true; return odd(n - 1); }
+            fun odd(n) { if (n == 0) return false; return even(n - 1); }
+            print even(10001);
+        """
+        lox, output, errors = run(code, "tree")
+        self.assertEqual(errors.getvalue(), "")
+        self.assertEqual(output.lines, ["false"])
+
+    def test_deep_recursion_is_a_runtime_error(self):
+        code = """
+            fun depth(n) { if (n == 0) return 0; return 1 + depth(n - 1); }
+            print depth(100000);
+        """
+        for engine in Lox.engines:
+            lox, output, errors = run(code, engine)
+            self.assertTrue(lox.reporter.has_runtime_error, engine)
+            self.assertTrue(errors.getvalue().startswith("Stack overflow.\n"), engine)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+from lox.error import NativeError
+from lox.natives import round_half_away, fixed, repeat
+
+
+class RoundTest(unittest.TestCase):
+
+    def test_halves_go_away_from_zero(self):
+        self.assertEqual(round_half_away(2.5), 3.0)
+        self.assertEqual(round_half_away(-2.5), -3.0)
+        self.assertEqual(round_half_away(0.5), 1.0)
+
+    def test_just_below_half(self):
+        self.assertEqual(round_half_away(0.49999999999999994), 0.0)
+        self.assertEqual(round_half_away(-0.49999999999999994), -0.0)
+
+    def test_large_and_special_values(self):
+        self.assertEqual(round_half_away(4503599627370497.0), 4503599627370497.0)
+        self.assertEqual(round_half_away(2.4), 2.0)
+        self.assertEqual(round_half_away(float("inf")), float("inf"))
+
+
+class FixedTest(unittest.TestCase):
+
+    def test_halves_go_away_from_zero_like_round(self):
+        self.assertEqual(fixed(2.5, 0.0), "3")
+        self.assertEqual(fixed(-2.5, 0.0), "-3")
+        self.assertEqual(fixed(0.125, 2.0), "0.13")
+        for x in (0.5, 1.5, 2.5, -0.5, 0.49999999999999994, 7.25):
+            self.assertEqual(float(fixed(x, 0.0)), round_half_away(x))
+
+    def test_only_true_halves_round_up(self):
+        # 1.005 is stored as a little less than 1.005.
+        self.assertEqual(fixed(1.005, 2.0), "1.00")
+        self.assertEqual(fixed(123.456, 1.0), "123.5")
+
+    def test_digits_are_bounded(self):
+        self.assertEqual(len(fixed(1.0, 100.0)), 102)
+        with self.assertRaises(NativeError):
+            fixed(1.0, 101.0)
+        with self.assertRaises(NativeError):
+            fixed(1.0, 1e300)
+
+    def test_extreme_values(self):
+        self.assertTrue(fixed(1.7976931348623157e308, 100.0).startswith("17976931348623157"))
+        self.assertEqual(fixed(float("inf"), 2.0), "inf")
+        self.assertEqual(fixed(-0.0, 1.0), "-0.0")
+
+
+class RepeatTest(unittest.TestCase):
+
+    def test_repeat(self):
+        self.assertEqual(repeat("ab", 3.0), "ababab")
+        self.assertEqual(repeat("", 5.0), "")
+
+    def test_count_is_bounded(self):
+        for text in ("ab", ""):
+            with self.assertRaises(NativeError):
+                repeat(text, 1e300)
+        with self.assertRaises(NativeError):
+            repeat("ab", 2.0 ** 30)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,29 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+class FileOutputTest(unittest.TestCase):
+
+    def test_writes_utf8_whatever_the_locale(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "out.txt")
+            code = ("from lox.output import FileOutput\n"
+                    f"output = FileOutput({path!r})\n"
+                    "output.print('h\\u00e9llo \\u2713')\n"
+                    "output.close()\n")
+            # An ASCII locale, without Python switching to UTF-8 on its own.
+            environment = dict(os.environ, LC_ALL="C", PYTHONCOERCECLOCALE="0", PYTHONUTF8="0")
+            subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=environment,
+                           check=True, capture_output=True)
+            with open(path, encoding="utf-8") as file:
+                self.assertEqual(file.read(), "h\u00e9llo \u2713\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
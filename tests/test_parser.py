@@ -0,0 +1,41 @@
+import unittest
+from io import StringIO
+from lox.lox import Lox
+from lox.output import CaptureOutput
+
+
+def run(code: str, engine: str = "tree") -> tuple[Lox, CaptureOutput, StringIO]:
+    output = CaptureOutput()
+    errors = StringIO()
+    lox = Lox(cache=False, output=output, errors=errors)
+    lox.run(code, engine)
+    return lox, output, errors
+
+
+class NestingTest(unittest.TestCase):
+
+    def test_deep_parentheses(self):
+        lox, output, errors = run("print " + "(" * 200 + "1" + ")" * 200 + ";")
+        self.assertTrue(lox.reporter.has_error)
+        self.assertEqual(errors.getvalue(), "[line 1] Error: Too much nesting.\n")
+        self.assertEqual(output.lines, [])
+
+    def test_long_flat_chain(self):
+        for engine in Lox.engines:
+            lox, output, errors = run("print " + " + ".join(["1"] * 200) + ";", engine)
+            self.assertFalse(lox.reporter.has_error, engine)
+            self.assertEqual(output.lines, ["200"], engine)
+
+    def test_long_string_concatenation(self):
+        lox, output, errors = run("print " + " + ".join(['"a"'] * 160) + ";")
+        self.assertFalse(lox.reporter.has_error)
+        self.assertEqual(output.lines, ["a" * 160])
+
+    def test_chain_too_long_for_later_passes(self):
+        lox, output, errors = run("print " + " + ".join(["1"] * 5000) + ";")
+        self.assertTrue(lox.reporter.has_error)
+        self.assertEqual(errors.getvalue(), "[line 1] Error: Too much nesting.\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,335 @@
+import time
+from contextlib import redirect_stdout
+from io import StringIO
+
+
+PROGRAMS = {
+    "fib": """
+fun fib(n) {
+  if (n < 2) return n;
+  return fib(n - 2) + fib(n - 1);
+}
+print fib(20);
+""",
+    "loop": """
+var sum = 0;
+for (var i = 0; i < 200000; i = i + 1) {
+  sum = sum + i * 2;
+}
+print sum;
+""",
+    "closures": """
+fun makeCounter() {
+  var count = 0;
+  fun increment() {
+    count = count + 1;
+    return count;
+  }
+  return increment;
+}
+var counter = makeCounter();
+var i = 0;
+while (i < 50000) {
+  counter();
+  i = i + 1;
+}
+print counter();
+""",
+}
+
+
+# Programs making a known number of Lox calls.
+CALL_PROGRAMS = {
+    "fib": ("""
+fun fib(n) {
+  if (n < 2) return n;
+  return fib(n - 2) + fib(n - 1);
+}
+fib(20);
+""", 21891),
+    "leaf": ("""
+fun identity(x) { return x; }
+var i = 0;
+while (i < 30000) {
+  identity(i);
+  i = i + 1;
+}
+""", 30000),
+}
+
+# Programs printing a known number of values of one kind.
+PRINT_PROGRAMS = {
+    "integers": ("""
+for (var i = 0; i < 100000; i = i + 1) print i;
+""", 100000),
+    "fractions": ("""
+for (var i = 0; i < 100000; i = i + 1) print i / 8;
+""", 100000),
+    "strings": ("""
+for (var i = 0; i < 100000; i = i + 1) print "line";
+""", 100000),
+}
+
+# The same work done in Lox and with natives.
+NATIVE_PROGRAMS = {
+    "sqrt": ("""
+var total = 0;
+for (var i = 1; i <= 2000; i = i + 1) {
+  var guess = i;
+  for (var step = 0; step < 20; step = step + 1) guess = (guess + i / guess) / 2;
+  total = total + guess;
+}
+print total;
+""", """
+var total = 0;
+for (var i = 1; i <= 2000; i = i + 1) total = total + sqrt(i);
+print total;
+"""),
+    "floor": ("""
+var total = 0;
+for (var i = 0; i < 2000; i = i + 1) {
+  var x = i / 7;
+  var whole = 0;
+  while (whole + 1 <= x) whole = whole + 1;
+  total = total + whole;
+}
+print total;
+""", """
+var total = 0;
+for (var i = 0; i < 2000; i = i + 1) total = total + floor(i / 7);
+print total;
+"""),
+    "repeat": ("""
+var text = "";
+for (var i = 0; i < 20000; i = i + 1) text = text + "ab";
+print len(text);
+""", """
+print len(repeat("ab", 20000));
+"""),
+    "sum": ("""
+var xs = map(split(repeat("7", 20000), ""), num);
+var total = 0;
+for (var i = 0; i < len(xs); i = i + 1) total = total + get(xs, i);
+print total;
+""", """
+var xs = map(split(repeat("7", 20000), ""), num);
+print sum(xs);
+"""),
+    "join": ("""
+var words = split(repeat("word ", 5000), " ");
+var text = "";
+for (var i = 0; i < len(words); i = i + 1) text = text + get(words, i) + ",";
+print len(text);
+""", """
+var words = split(repeat("word ", 5000), " ");
+print len(join(words, ",")) + 1;
+"""),
+}
+
+
+class Benchmark:
+    @staticmethod
+    def main(args: list):
+        if len(args) != 1 or args[0] not in Benchmark.suites():
+            print("Usage: python -m tool.benchmark <" +
+                  "|".join(Benchmark.suites()) + ">")
+            exit(1)
+        Benchmark.suites()[args[0]]()
+
+    @staticmethod
+    def suites():
+        return {
+            "engines": Benchmark.engines,
+            "calls": Benchmark.calls,
+            "scanner": Benchmark.scanner,
+            "memory": Benchmark.memory,
+            "startup": Benchmark.startup,
+            "print": Benchmark.prints,
+            "natives": Benchmark.natives,
+            "batch": Benchmark.batch,
+        }
+
+    @staticmethod
+    def best_of(repeat: int, function):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            function()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    @staticmethod
+    def engines():
+        from lox.lox import Lox
+
+        lox = Lox()
+        print(f"{'program':<10}" +
+              "".join(f"{engine:>12}" for engine in Lox.engines))
+        for name, code in PROGRAMS.items():
+            timings = []
+            for engine in Lox.engines:
+                def run():
+                    with redirect_stdout(StringIO()):
+                        lox.run(code, engine)
+                timings.append(Benchmark.best_of(3, run))
+            print(f"{name:<10}" +
+                  "".join(f"{timing:>11.3f}s" for timing in timings))
+
+    @staticmethod
+    def calls():
+        from lox.lox import Lox
+
+        lox = Lox()
+        print(f"{'calls/s':<10}" +
+              "".join(f"{engine:>12}" for engine in Lox.engines))
+        for name, (code, calls) in CALL_PROGRAMS.items():
+            rates = []
+            for engine in Lox.engines:
+                timing = Benchmark.best_of(3, lambda: lox.run(code, engine))
+                rates.append(calls / timing)
+            print(f"{name:<10}" + "".join(f"{rate:>12,.0f}" for rate in rates))
+
+    @staticmethod
+    def scanner():
+        from lox.scanner import Scanner
+        from lox.fast_scanner import FastScanner
+
+        # A generated multi-megabyte source, like the ones that prompted the
+        # fast scanner.
+        source = "\n".join(PROGRAMS.values()) * 1000
+        tokens = len(FastScanner(source).scan_tokens())
+        print(f"{len(source):,} characters, {tokens:,} tokens")
+        for scanner in (Scanner, FastScanner):
+            timing = Benchmark.best_of(3, lambda: scanner(source).scan_tokens())
+            print(f"{scanner.__name__:<12}{tokens / timing:>12,.0f} tokens/s")
+
+    @staticmethod
+    def memory():
+        import tracemalloc
+        from lox.fast_scanner import FastScanner
+
+        source = "\n".join(PROGRAMS.values()) * 1000
+        tracemalloc.start()
+        tokens = FastScanner(source).scan_tokens()
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        print(f"{len(tokens):,} tokens, "
+              f"{size * 100_000 / len(tokens) / 1024:,.0f} KiB per 100k tokens")
+
+    @staticmethod
+    def prints():
+        import os
+        from lox.lox import Lox
+        from lox.output import BufferedOutput
+
+        # Printed lines are formatted and written out as usual, to a file
+        # that discards them.
+        with open(os.devnull, "w") as devnull:
+            lox = Lox(output=BufferedOutput(devnull))
+            print(f"{'prints/s':<10}" +
+                  "".join(f"{engine:>12}" for engine in Lox.engines))
+            for name, (code, prints) in PRINT_PROGRAMS.items():
+                rates = []
+                for engine in Lox.engines:
+                    timing = Benchmark.best_of(3, lambda: lox.run(code, engine))
+                    rates.append(prints / timing)
+                print(f"{name:<10}" +
+                      "".join(f"{rate:>12,.0f}" for rate in rates))
+
+    @staticmethod
+    def natives():
+        from lox.lox import Lox
+        from lox.output import CaptureOutput
+
+        lox = Lox(output=CaptureOutput())
+        print(f"{'':<8}{'engine':<10}{'lox':>10}{'native':>10}{'speedup':>10}")
+        for name, (loop, native) in NATIVE_PROGRAMS.items():
+            for engine in Lox.engines:
+                slow = Benchmark.best_of(3, lambda: lox.run(loop, engine))
+                fast = Benchmark.best_of(3, lambda: lox.run(native, engine))
+                print(f"{name:<8}{engine:<10}{slow * 1000:>8.1f}ms"
+                      f"{fast * 1000:>8.1f}ms{slow / fast:>9.1f}x")
+
+    @staticmethod
+    def startup():
+        import os
+        import subprocess
+        import sys
+        import tempfile
+
+        # Each command runs in a fresh interpreter, as it would when launched
+        # per request. -X importtime reports every module imported, indented
+        # by depth, with the time including its own imports.
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        with tempfile.TemporaryDirectory() as directory:
+            expression = os.path.join(directory, "expression.lox")
+            with open(expression, "w") as file:
+                file.write("(1 + 2) * 3 - 4 / 5")
+            script = os.path.join(directory, "script.lox")
+            with open(script, "w") as file:
+                file.write('var greeting = "hello";\nprint greeting;\n')
+
+            commands = {
+                "tokenize": ["tokenize", expression],
+                "parse": ["parse", expression],
+                "evaluate": ["evaluate", expression],
+                "run": ["run", script, "--no-cache"],
+                "run cached": ["run", script],
+            }
+            print(f"{'command':<12}{'modules':>8}{'imports':>10}{'total':>10}")
+            for name, args in commands.items():
+                command = [sys.executable, "-X", "importtime", "-m", "app.cli"] + args
+                modules = imports = None
+
+                def run():
+                    nonlocal modules, imports
+                    stderr = subprocess.run(command, cwd=root, capture_output=True,
+                                            text=True).stderr
+                    lines = [line.split("|") for line in stderr.splitlines()
+                             if line.startswith("import time:") and "self" not in line]
+                    modules = len(lines)
+                    timing = sum(int(cumulative) for _, cumulative, module in lines
+                                 if not module.startswith("  "))
+                    imports = timing if imports is None else min(imports, timing)
+                total = Benchmark.best_of(5, run)
+                print(f"{name:<12}{modules:>8}{imports / 1000:>8.1f}ms"
+                      f"{total * 1000:>8.1f}ms")
+
+    @staticmethod
+    def batch():
+        import os
+        import subprocess
+        import sys
+        import tempfile
+        from app.batch import run_batch
+
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        with tempfile.TemporaryDirectory() as directory:
+            scripts = []
+            for copy in range(8):
+                for name, code in PROGRAMS.items():
+                    script = os.path.join(directory, f"{name}{copy}.lox")
+                    with open(script, "w") as file:
+                        file.write(code)
+                    scripts.append(script)
+
+            def spawn():
+                for script in scripts:
+                    subprocess.run([sys.executable, "-m", "app.cli", "run", script],
+                                   cwd=root, capture_output=True)
+            print(f"{len(scripts)} scripts, {os.cpu_count()} cores")
+            print(f"{'process per script':<20}{Benchmark.best_of(1, spawn):>8.2f}s")
+            jobs = 1
+            while True:
+                timing = Benchmark.best_of(
+                    1, lambda: run_batch(directory, "tree", {}, jobs))
+                print(f"{f'batch --jobs={jobs}':<20}{timing:>8.2f}s")
+                if jobs >= os.cpu_count():
+                    break
+                jobs = min(jobs * 2, os.cpu_count())
+
+
+if __name__ == "__main__":
+    import sys
+    Benchmark.main(sys.argv[1:])
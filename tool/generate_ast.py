@@ -7,33 +7,38 @@ class GenerateAst:
             print("Usage: generate_ast <output directory>")
             exit(1)
         output_dir = args[0]
+        # Fields after ";" are annotations filled in by later passes. They
+        # start out as None and are not part of a node's structure.
         GenerateAst.define_ast(output_dir, "Stmt", [
-            "Block : list[Stmt] statements",
+            "Block : list[Stmt] statements ; bool | None bare",
             "Expression : Expr expression",
-            "If : Expr condition, Stmt then_branch, Stmt else_branch",
+            "If : Expr condition, Stmt then_branch, Stmt | None else_branch",
             "Print : Expr expression",
-            "Var : Token name, Expr initializer",
-            "While : Expr condition, Stmt body",
+            "Var : Token name, Expr | None initializer",
+            "While : Expr condition, Stmt body ; bool | None reuse",
             "Function : Token name, list[Token] params, list[Stmt] body",
-            "Return     : Token keyword, Expr value"
+            "Return     : Token keyword, Expr | None value"
+        ])
+        GenerateAst.define_ast(output_dir, "Expr", [
+            "Assign   : Token name, Expr value ; int | None depth, int | None slot",
+            "Binary   : Expr left, Token operator, Expr right ; object operation",
+            "Grouping : Expr expression",
+            "Call     : Expr callee, Token paren, list[Expr] arguments ; object checked",
+            "Literal  : object value",
+            "Logical  : Expr left, Token operator, Expr right",
+            "Unary    : Token operator, Expr right",
+            "Variable : Token name ; int | None depth, int | None slot, tuple | None cache"
         ])
-        # GenerateAst.define_ast(output_dir, "Expr", [
-        #     "Assign   : Token name, Expr value",
-        #     "Binary   : Expr left, Token operator, Expr right",
-        #     "Grouping : Expr expression",
-        #     "Call     : Expr calle, Token paren, list[Expr] arguments",
-        #     "Literal  : object value",
-        #     "Logical  : Expr left, Token operator, Expr right",
-        #     "Unary    : Token operator, Expr right",
-        #     "Variable : Token name"
-        # ])
 
     @staticmethod
     def define_ast(output_dir: str, base_name: str, types: list):
         path = output_dir + "/" + base_name.lower() + ".py"
         with open(path, "w") as file:
-            file.write("from lox.token import Token\n\n")
-            file.write(f"class {base_name}:\n")
+            file.write("from lox.token import Token\n")
+            if base_name != "Expr":
+                file.write("from lox.expr import Expr\n")
+            file.write(f"\n\nclass {base_name}:\n")
+            file.write("    __slots__ = ()\n")
             GenerateAst.define_visitor(file, base_name, types)
             GenerateAst.define_accept(file, base_name, types)
             for type in types:
@@ -48,39 +53,83 @@ class GenerateAst:
             type_name = type.split(":")[0].strip()
             file.write(
                 f"        def visit_{base_name.lower()}_{type_name.lower()}(self, {base_name.lower()}: '{type_name}'):\n")
-            file.write("            pass\n")
-        file.write("\n")
+            file.write("            pass\n\n")
 
     @staticmethod
     def define_accept(file, base_name: str, types: list):
-        file.write("\n    def accept(self, visitor: Visitor ):\n")
+        file.write("    def accept(self, visitor: Visitor):\n")
+        file.write("        pass\n\n")
+        # Nodes compare and hash by structure, tokens included, so equal
+        # source text on the same lines gives equal nodes.
+        file.write("    def key(self) -> tuple:\n")
         file.write("        pass\n\n")
+        file.write("    def __eq__(self, other):\n")
+        file.write(
+            "        return type(other) is type(self) and self.key() == other.key()\n\n")
+        file.write("    def __hash__(self):\n")
+        file.write("        return hash(self.key())\n")
+
+    @staticmethod
+    def split_field(field: str) -> tuple[str, str]:
+        field_type, field_name = field.strip().rsplit(" ", 1)
+        return field_type, field_name
 
     @staticmethod
     def define_type(file, base_name: str, class_name: str, fields: str):
         file.write(f"\n\nclass {class_name}({base_name}):\n")
-        fields = fields.split(", ")
-        for field in fields:
-            field_name = field.split(" ")[1]
-            file.write(f"    {field_name}: {field.split(' ')[0]}\n")
-        GenerateAst.define_init(file, class_name, fields)
+        fields, _, annotations = fields.partition(";")
+        fields = [GenerateAst.split_field(field)
+                  for field in fields.split(",")]
+        annotations = [GenerateAst.split_field(field)
+                       for field in annotations.split(",") if field.strip()]
+
+        names = [name for _, name in fields + annotations]
+        slots = ", ".join(f'"{name}"' for name in names)
+        if len(names) == 1:
+            slots += ","
+        file.write(f"    __slots__ = ({slots})\n\n")
+        for field_type, field_name in fields + annotations:
+            file.write(f"    {field_name}: {field_type}\n")
+        GenerateAst.define_init(file, fields, annotations)
         GenerateAst.define_type_accept(file, base_name, class_name)
+        GenerateAst.define_key(file, class_name, fields)
 
     @staticmethod
-    def define_init(file, class_name: str, fields: list):
+    def define_init(file, fields: list, annotations: list):
         file.write(
-            f"\n    def __init__(self, {', '.join([field.split(' ')[1] for field in fields])}):\n")
-        for field in fields:
-            field_name = field.split(" ")[1]
+            f"\n    def __init__(self, {', '.join(name for _, name in fields)}):\n")
+        for _, field_name in fields:
             file.write(f"        self.{field_name} = {field_name}\n")
+        for _, field_name in annotations:
+            file.write(f"        self.{field_name} = None\n")
         file.write("\n")
 
     @staticmethod
     def define_type_accept(file, base_name: str, class_name: str):
-        file.write(f"\n    def accept(self, visitor: Expr.Visitor):\n")
+        file.write(f"    def accept(self, visitor: {base_name}.Visitor):\n")
         file.write(
             f"        return visitor.visit_{base_name.lower()}_{class_name.lower()}(self)\n")
 
+    @staticmethod
+    def define_key(file, class_name: str, fields: list):
+        keys = [GenerateAst.field_key(field_type, "self." + field_name)
+                for field_type, field_name in fields]
+        file.write("\n    def key(self) -> tuple:\n")
+        file.write(f"        return ({class_name}, {', '.join(keys)})\n")
+
+    @staticmethod
+    def field_key(field_type: str, value: str) -> str:
+        if field_type.startswith("list["):
+            return f"tuple(item.key() for item in {value})"
+        if field_type == "Token":
+            return f"{value}.key()"
+        if field_type == "object":
+            # 1 == True and 0.0 == -0.0 in Python, but not in Lox.
+            return f"(type({value}), repr({value}))"
+        if field_type.endswith("| None"):
+            return f"None if {value} is None else {value}.key()"
+        return f"{value}.key()"
+
 
 if __name__ == "__main__":
     import sys